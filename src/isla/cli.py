@@ -49,6 +49,7 @@ from isla.isla_predicates import (
 )
 from isla.isla_shortcuts import true
 from isla.language import parse_bnf, parse_isla, StructuralPredicate, SemanticPredicate
+from isla.parallel_solver import ParallelISLaSolver, default_portfolio
 from isla.solver import (
     ISLaSolver,
     GrammarBasedBlackboxCostComputer,
@@ -135,26 +136,52 @@ def solve(stdout, stderr, parser: ArgumentParser, args: Namespace):
         command, grammar, args.k, stderr, args.weight_vector
     )
 
-    solver = ISLaSolver(
-        grammar,
-        constraint,
+    solver_args = dict(
         max_number_free_instantiations=args.free_instantiations,
         max_number_smt_instantiations=args.smt_instantiations,
         enforce_unique_trees_in_queue=args.unique_trees,
-        cost_computer=cost_computer,
         timeout_seconds=args.timeout if args.timeout > 0 else None,
         activate_unsat_support=args.unsat_support,
         grammar_unwinding_threshold=args.unwinding_depth,
         structural_predicates=structural_predicates,
         semantic_predicates=semantic_predicates,
+        max_queue_states=args.max_queue_states if args.max_queue_states > 1 else None,
     )
 
+    if args.jobs > 1 and args.profile:
+        print(
+            f"isla {command}: error: --profile is not supported for --jobs > 1",
+            file=stderr,
+        )
+        sys.exit(USAGE_ERROR)
+
+    if args.jobs > 1:
+        solver = ParallelISLaSolver(
+            grammar,
+            constraint,
+            portfolio=default_portfolio(
+                args.jobs,
+                cost_settings=cost_computer.cost_settings,
+                vary_tree_insertion_methods=not args.unsat_support,
+            ),
+            **solver_args,
+        )
+    else:
+        solver = ISLaSolver(
+            grammar,
+            constraint,
+            cost_computer=cost_computer,
+            profile=bool(args.profile),
+            **solver_args,
+        )
+
     try:
         num_solutions = args.num_solutions
+        limit = num_solutions if num_solutions > 0 else None
         i = 0
-        while not (0 < num_solutions <= i):
-            try:
-                tree = solver.solve()
+
+        try:
+            for tree in solver.solutions(limit=limit):
                 result = (
                     derivation_tree_to_json(tree, args.pretty_print)
                     if args.tree
@@ -175,22 +202,26 @@ def solve(stdout, stderr, parser: ArgumentParser, args: Namespace):
                         "wb",
                     ) as out_file:
                         out_file.write(result.encode("utf-8"))
-            except StopIteration:
-                print("UNSAT", flush=True, file=stderr)
-                break
-            except TimeoutError:
-                break
-            except Exception as exc:
-                print(
-                    f"isla solve: error: An exception ({type(exc).__name__}) occurred "
-                    + f"during constraint solving, message: `{exc}`",
-                    file=stderr,
-                )
-                sys.exit(1)
 
-            i += 1
+                i += 1
+        except Exception as exc:
+            print(
+                f"isla solve: error: An exception ({type(exc).__name__}) occurred "
+                + f"during constraint solving, message: `{exc}`",
+                file=stderr,
+            )
+            sys.exit(1)
+
+        if (limit is None or i < limit) and solver.search_exhausted():
+            print("UNSAT", flush=True, file=stderr)
     except KeyboardInterrupt:
         sys.exit(0)
+    finally:
+        if isinstance(solver, ParallelISLaSolver):
+            solver.close()
+        elif args.profile:
+            with open(args.profile, "w") as profile_file:
+                json.dump(solver.stats(), profile_file, indent=4)
 
 
 def read_predicates(
@@ -992,6 +1023,36 @@ if `--tree` is used.""",
 
     num_solutions_arg(parser)
     timeout_arg(parser)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=get_default(stderr, "solve", "--jobs").get(),
+        help="""
+The number of solver processes to run in parallel. For values greater than 1, a
+portfolio of solvers with different random seeds, cost weight vectors, and tree
+insertion settings is started, and their solutions are merged into a single,
+deduplicated stream""",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        default=get_default(stderr, "solve", "--profile").get_unsafe(),
+        help="""
+Record the time spent in the individual stages of the solver and in operations like
+Z3 queries, parsing, tree insertion, and cost computation, and write these
+statistics in JSON format to FILE when the solver stops""",
+    )
+    parser.add_argument(
+        "--max-queue-states",
+        type=int,
+        default=get_default(stderr, "solve", "--max-queue-states").get(),
+        help="""
+The maximum number of solver states kept in memory. If the queue of states grows
+beyond this number, the more costly half is moved to a temporary file on disk and
+loaded back when the states in memory have been processed. Useful for long solver
+runs. Values smaller than 2 mean that there is no bound""",
+    )
     parser.add_argument(
         "--unsat-support",
         action="store_true",
@@ -120,6 +120,11 @@ class DerivationTree:
 
             result.__dict__.update(a_dict)
 
+            # String hashes are salted differently in each Python process; thus,
+            # we recompute cached hashes when needed.
+            result.__hash = None
+            result.__structural_hash = None
+
             # To ensure that when resuming from a checkpoint during debugging,
             # ID uniqueness constraints are maintained.
             if result.id >= DerivationTree.next_id:
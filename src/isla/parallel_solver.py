@@ -0,0 +1,854 @@
+# Copyright © 2023 CISPA Helmholtz Center for Information Security.
+# Author: Dominic Steinhöfel.
+#
+# This file is part of ISLa.
+#
+# ISLa is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ISLa is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ISLa.  If not, see <http://www.gnu.org/licenses/>.
+
+import heapq
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Optional,
+    List,
+    Sequence,
+    Dict,
+    Any,
+    Deque,
+    Set,
+    Tuple,
+    Iterator,
+)
+
+import dill
+from grammar_graph.gg import GrammarGraph
+from multiprocess.managers import BaseManager
+from pathos.helpers import mp
+
+from isla import language
+from isla.derivation_tree import DerivationTree
+from isla.existential_helpers import DIRECT_EMBEDDING, SELF_EMBEDDING, CONTEXT_ADDITION
+from isla.language import parse_bnf
+from isla.solver import (
+    ISLaSolver,
+    SolutionState,
+    CostSettings,
+    CostWeightVector,
+    GrammarBasedBlackboxCostComputer,
+    STD_COST_SETTINGS,
+)
+from isla.type_defs import Grammar
+
+# Combinations of tree insertion methods the portfolio workers cycle through.
+TREE_INSERTION_PORTFOLIO = (
+    DIRECT_EMBEDDING + SELF_EMBEDDING + CONTEXT_ADDITION,
+    DIRECT_EMBEDDING + SELF_EMBEDDING,
+    DIRECT_EMBEDDING + CONTEXT_ADDITION,
+    DIRECT_EMBEDDING,
+)
+
+# Message kinds sent from portfolio workers to the parent process.
+_SOLUTION = "solution"
+_DONE = "done"
+_TIMEOUT = "timeout"
+_ERROR = "error"
+
+
+@dataclass(frozen=True)
+class PortfolioConfiguration:
+    """
+    The settings of a single worker of a
+    :class:`~isla.parallel_solver.ParallelISLaSolver`. A value of :code:`None` for
+    :code:`tree_insertion_methods` means that the worker uses the
+    :class:`~isla.solver.ISLaSolver` default.
+    """
+
+    seed: int
+    cost_settings: CostSettings = STD_COST_SETTINGS
+    tree_insertion_methods: Optional[int] = None
+
+
+def default_portfolio(
+    jobs: int,
+    seed: int = 0,
+    cost_settings: CostSettings = STD_COST_SETTINGS,
+    vary_tree_insertion_methods: bool = True,
+) -> List[PortfolioConfiguration]:
+    """
+    Computes a portfolio of :code:`jobs` worker configurations. The first worker
+    uses the given settings unchanged; all other workers use a different random seed,
+    randomly perturbed cost weights, and (if :code:`vary_tree_insertion_methods` is
+    set) a different combination of tree insertion methods.
+
+    >>> portfolio = default_portfolio(3, seed=42)
+    >>> [config.seed for config in portfolio]
+    [42, 43, 44]
+    >>> portfolio[0].cost_settings == STD_COST_SETTINGS
+    True
+    >>> portfolio[1].cost_settings == STD_COST_SETTINGS
+    False
+    >>> [config.tree_insertion_methods for config in portfolio]
+    [7, 3, 5]
+
+    Weights that are zero stay zero, since they deactivate a cost factor:
+
+    >>> settings = CostSettings(CostWeightVector(1, 0, 1, 0, 1))
+    >>> [w for w in default_portfolio(2, cost_settings=settings)[1].cost_settings
+    ...     .weight_vector].count(0)
+    2
+
+    :param jobs: The number of workers.
+    :param seed: The seed of the first worker. Worker :code:`i` uses
+      :code:`seed + i`.
+    :param cost_settings: The cost settings of the first worker, which are perturbed
+      for the other workers.
+    :param vary_tree_insertion_methods: If False, all workers use the solver's
+      default tree insertion methods.
+    :return: A list of worker configurations.
+    """
+    assert jobs > 0
+
+    result: List[PortfolioConfiguration] = []
+    for idx in range(jobs):
+        worker_seed = seed + idx
+        if idx == 0:
+            worker_cost_settings = cost_settings
+        else:
+            rng = random.Random(worker_seed)
+            worker_cost_settings = CostSettings(
+                CostWeightVector(
+                    *[
+                        weight * rng.uniform(0.5, 1.5)
+                        for weight in cost_settings.weight_vector
+                    ]
+                ),
+                k=cost_settings.k,
+            )
+
+        result.append(
+            PortfolioConfiguration(
+                worker_seed,
+                worker_cost_settings,
+                TREE_INSERTION_PORTFOLIO[idx % len(TREE_INSERTION_PORTFOLIO)]
+                if vary_tree_insertion_methods
+                else None,
+            )
+        )
+
+    return result
+
+
+class ParallelISLaSolver:
+    """
+    Runs a portfolio of :class:`~isla.solver.ISLaSolver` instances in separate
+    processes and merges their solutions into a single stream. Each worker uses a
+    different random seed, cost weight vector, and combination of tree insertion
+    methods (see :func:`~isla.parallel_solver.default_portfolio`). Solutions are
+    deduplicated based on their structural hash.
+
+    The interface of :meth:`~isla.parallel_solver.ParallelISLaSolver.solve` is that
+    of :meth:`isla.solver.ISLaSolver.solve`: A :class:`StopIteration` is raised once
+    all workers ran out of solutions, a :class:`TimeoutError` if at least one worker
+    stopped because of a timeout and no more solutions are available.
+
+    Worker processes are started with the first call to
+    :meth:`~isla.parallel_solver.ParallelISLaSolver.solve` and should be stopped
+    by calling :meth:`~isla.parallel_solver.ParallelISLaSolver.close`, or by using
+    the solver as a context manager.
+    """
+
+    def __init__(
+        self,
+        grammar: Grammar | str,
+        formula: Optional[language.Formula | str] = None,
+        jobs: Optional[int] = None,
+        seed: int = 0,
+        portfolio: Optional[Sequence[PortfolioConfiguration]] = None,
+        max_buffered_solutions: int = 100,
+        **solver_args: Any,
+    ):
+        """
+        :param grammar: The underlying grammar; either, as a "Fuzzing Book"
+          dictionary or in BNF syntax.
+        :param formula: The formula to solve; either a string or a readily parsed
+          formula.
+        :param jobs: The number of worker processes. Defaults to the number of CPUs.
+          Ignored if a :code:`portfolio` is passed.
+        :param seed: The random seed of the first worker.
+        :param portfolio: The worker configurations. If not set, a portfolio is
+          computed using :func:`~isla.parallel_solver.default_portfolio`.
+        :param max_buffered_solutions: The maximum number of solutions each worker
+          may compute in advance before it is blocked.
+        :param solver_args: Further arguments to the
+          :class:`~isla.solver.ISLaSolver` constructor. If :code:`cost_computer` is
+          passed, it is used by all workers, and the cost settings of the portfolio
+          are ignored. If :code:`tree_insertion_methods` or
+          :code:`activate_unsat_support` are passed, the tree insertion methods are
+          not varied.
+        """
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.grammar = grammar
+        self.formula = formula
+        self.solver_args: Dict[str, Any] = solver_args
+
+        if portfolio is None:
+            portfolio = default_portfolio(
+                jobs or os.cpu_count() or 1,
+                seed=seed,
+                vary_tree_insertion_methods=(
+                    solver_args.get("tree_insertion_methods") is None
+                    and not solver_args.get("activate_unsat_support", False)
+                ),
+            )
+
+        assert portfolio, "You have to provide at least one worker configuration"
+        self.portfolio: List[PortfolioConfiguration] = list(portfolio)
+        self.max_buffered_solutions = max_buffered_solutions
+
+        self.__processes: List[mp.Process] = []
+        self.__results: Optional[mp.Queue] = None
+        self.__running: Set[int] = set()
+        self.__timed_out = False
+        self.__exhausted = False
+        self.__seen_hashes: Set[int] = set()
+        self.__solutions: Deque[DerivationTree] = deque()
+
+    @property
+    def jobs(self) -> int:
+        return len(self.portfolio)
+
+    def solve(self) -> DerivationTree:
+        """
+        Returns the next solution found by any of the workers that has not been
+        returned before.
+
+        :return: A solution for the ISLa formula passed to the
+          :class:`~isla.parallel_solver.ParallelISLaSolver`.
+        """
+        if not self.__processes:
+            self.__start_workers()
+
+        while not self.__solutions:
+            if not self.__running:
+                self.close()
+                if self.__timed_out:
+                    raise TimeoutError()
+                self.__exhausted = True
+                raise StopIteration()
+
+            self.__receive()
+
+        return self.__solutions.popleft()
+
+    def solutions(self, limit: Optional[int] = None) -> Iterator[DerivationTree]:
+        """
+        Generates solutions until all workers are done or :code:`limit` solutions
+        have been produced. As :meth:`isla.solver.ISLaSolver.solutions`, this
+        generator does not raise a :class:`StopIteration` or :class:`TimeoutError`,
+        but simply ends.
+
+        :param limit: The maximum number of solutions to generate, if any.
+        :return: A generator of solutions.
+        """
+
+        num_solutions = 0
+        while limit is None or num_solutions < limit:
+            try:
+                yield self.solve()
+            except (StopIteration, TimeoutError):
+                return
+
+            num_solutions += 1
+
+    def search_exhausted(self) -> bool:
+        """
+        Checks whether all workers ended because they exhausted their search
+        space (and not because of a timeout), and all solutions have been
+        returned.
+
+        :return: True iff there are no more solutions.
+        """
+
+        return self.__exhausted and not self.__solutions
+
+    def close(self) -> None:
+        """
+        Stops all worker processes. Already received solutions can still be
+        obtained from :meth:`~isla.parallel_solver.ParallelISLaSolver.solve`.
+        """
+        for process in self.__processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.__processes:
+            process.join()
+
+        self.__running.clear()
+
+        if self.__results is not None:
+            self.__results.close()
+            self.__results.join_thread()
+            self.__results = None
+
+    def __enter__(self) -> "ParallelISLaSolver":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __start_workers(self) -> None:
+        self.__results = mp.Queue(maxsize=self.max_buffered_solutions * self.jobs)
+
+        for idx, config in enumerate(self.portfolio):
+            process = mp.Process(
+                target=_portfolio_worker,
+                args=(
+                    idx,
+                    config,
+                    self.grammar,
+                    self.formula,
+                    self.solver_args,
+                    self.__results,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.__processes.append(process)
+            self.__running.add(idx)
+
+        self.logger.debug("Started %d portfolio workers", self.jobs)
+
+    def __receive(self) -> None:
+        try:
+            kind, idx, payload = self.__results.get(timeout=1)
+        except queue.Empty:
+            # Detect workers that died without notifying us (e.g., killed by the OS).
+            for idx in list(self.__running):
+                if not self.__processes[idx].is_alive():
+                    self.logger.warning("Portfolio worker %d died unexpectedly", idx)
+                    self.__running.discard(idx)
+            return
+
+        if kind == _SOLUTION:
+            assert isinstance(payload, DerivationTree)
+            tree_hash = payload.structural_hash()
+            if tree_hash not in self.__seen_hashes:
+                self.__seen_hashes.add(tree_hash)
+                self.__solutions.append(payload)
+        elif kind == _ERROR:
+            self.close()
+            raise payload
+        else:
+            assert kind in (_DONE, _TIMEOUT)
+            self.logger.debug("Portfolio worker %d finished (%s)", idx, kind)
+            self.__running.discard(idx)
+            self.__timed_out = self.__timed_out or kind == _TIMEOUT
+
+
+def _portfolio_worker(
+    idx: int,
+    config: PortfolioConfiguration,
+    grammar: Grammar | str,
+    formula: Optional[language.Formula | str],
+    solver_args: Dict[str, Any],
+    results: mp.Queue,
+) -> None:
+    random.seed(config.seed)
+
+    try:
+        solver_args = dict(solver_args)
+        if solver_args.get("cost_computer") is None:
+            solver_args["cost_computer"] = GrammarBasedBlackboxCostComputer(
+                config.cost_settings,
+                GrammarGraph.from_grammar(
+                    parse_bnf(grammar) if isinstance(grammar, str) else grammar
+                ),
+            )
+        if config.tree_insertion_methods is not None:
+            solver_args["tree_insertion_methods"] = config.tree_insertion_methods
+
+        solver = ISLaSolver(grammar, formula, **solver_args)
+
+        while True:
+            results.put((_SOLUTION, idx, solver.solve()))
+    except StopIteration:
+        results.put((_DONE, idx, None))
+    except TimeoutError:
+        results.put((_TIMEOUT, idx, None))
+    except Exception as exc:
+        results.put((_ERROR, idx, exc))
+
+
+FrontierEntry = Tuple[float, int, int, bytes]
+
+
+def pack_frontier_entry(cost: float, state: SolutionState) -> FrontierEntry:
+    """
+    Converts a queue entry into the format used by the
+    :class:`~isla.parallel_solver.FrontierCoordinator`: a tuple of the cost, the
+    hash of the state, the structural hash of its tree, and the pickled state.
+    The coordinator only needs the first three elements and never unpickles the
+    state. This matters since the manager serves each worker in a separate thread,
+    and unpickling SMT formulas calls the Z3 parser, which is not thread-safe.
+
+    >>> from isla.isla_shortcuts import true
+    >>> state = SolutionState(true(), DerivationTree("<a>", None))
+    >>> cost, unpacked = unpack_frontier_entry(pack_frontier_entry(1, state))
+    >>> cost, unpacked == state
+    (1, True)
+
+    :param cost: The cost of the state.
+    :param state: The state.
+    :return: The packed entry.
+    """
+    return cost, hash(state), state.tree.structural_hash(), dill.dumps(state)
+
+
+def unpack_frontier_entry(entry: FrontierEntry) -> Tuple[float, SolutionState]:
+    """
+    The inverse of :func:`~isla.parallel_solver.pack_frontier_entry`.
+
+    :param entry: The packed entry.
+    :return: A pair of the cost and the state.
+    """
+    cost, _, _, pickled_state = entry
+    return cost, dill.loads(pickled_state)
+
+
+class FrontierCoordinator:
+    """
+    Holds the global queue of a :class:`~isla.parallel_solver.WorkSharingISLaSolver`
+    (in the format produced by :func:`~isla.parallel_solver.pack_frontier_entry`).
+    Workers take the states with the highest priority (lowest cost) from the
+    coordinator, process them, and hand back the resulting new states and
+    solutions. The coordinator lives in a
+    :class:`~isla.parallel_solver.FrontierManager` process and is accessed via
+    proxies; all methods are thread-safe.
+
+    >>> from isla.isla_shortcuts import true
+    >>> s1 = SolutionState(true(), DerivationTree("<a>", None))
+    >>> s2 = SolutionState(true(), DerivationTree("<b>", None))
+    >>> coordinator = FrontierCoordinator(
+    ...     [pack_frontier_entry(2, s1), pack_frontier_entry(1, s2)])
+    >>> def trees(entries):
+    ...     return [str(unpack_frontier_entry(entry)[1].tree) for entry in entries]
+    >>> trees(coordinator.take_states(0, 1))
+    ['<b>']
+    >>> coordinator.poll()
+    ([], False)
+    >>> coordinator.return_states(
+    ...     0, 1, [pack_frontier_entry(0.5, s2)], [DerivationTree("b", ())])
+    >>> trees(coordinator.take_states(1, 5))
+    ['<b>', '<a>']
+    >>> coordinator.take_states(1, 5)
+    []
+    >>> coordinator.return_states(1, 2, [], [])
+    >>> solutions, finished = coordinator.poll()
+    >>> [str(solution) for solution in solutions], finished
+    (['b'], True)
+    >>> print(coordinator.take_states(0, 1))
+    None
+    """
+
+    def __init__(
+        self,
+        initial_states: Sequence[FrontierEntry],
+        max_buffered_solutions: int = 100,
+        enforce_unique_trees_in_queue: bool = False,
+    ):
+        self.enforce_unique_trees_in_queue = enforce_unique_trees_in_queue
+        self.queue: List[FrontierEntry] = []
+        self.state_hashes_in_queue: Set[int] = set()
+        self.tree_hashes_in_queue: Set[int] = set()
+        for entry in initial_states:
+            self.__push(entry)
+
+        self.in_flight: Dict[int, int] = {}
+        self.solutions: List[DerivationTree] = []
+        self.max_buffered_solutions = max_buffered_solutions
+        self.closed = False
+        self.failure: Optional[Exception] = None
+        self.lock = threading.Lock()
+
+    def take_states(
+        self, worker: int, max_states: int
+    ) -> Optional[List[FrontierEntry]]:
+        """
+        Hands out up to :code:`max_states` states with the highest priority to
+        :code:`worker`. Returns an empty list if there is currently no work (i.e.,
+        the queue is empty, but other workers are still processing states, or
+        enough solutions are buffered), and None if the search is finished or the
+        coordinator was closed.
+
+        :param worker: The ID of the requesting worker.
+        :param max_states: The maximum number of states to hand out.
+        :return: A list of packed queue entries, or None.
+        """
+        with self.lock:
+            if self.closed or self.__finished():
+                return None
+
+            if len(self.solutions) >= self.max_buffered_solutions:
+                return []
+
+            result = [
+                heapq.heappop(self.queue)
+                for _ in range(min(max_states, len(self.queue)))
+            ]
+
+            for _, state_hash, tree_hash, _ in result:
+                self.state_hashes_in_queue.discard(state_hash)
+                self.tree_hashes_in_queue.discard(tree_hash)
+
+            self.in_flight[worker] = self.in_flight.get(worker, 0) + len(result)
+            return result
+
+    def return_states(
+        self,
+        worker: int,
+        num_processed: int,
+        new_states: Sequence[FrontierEntry],
+        solutions: Sequence[DerivationTree],
+    ) -> None:
+        """
+        Called by :code:`worker` after it processed :code:`num_processed` states.
+
+        :param worker: The ID of the worker.
+        :param num_processed: The number of processed states.
+        :param new_states: The packed queue entries of the new states produced by
+          the worker. States that are already in the queue are discarded; if
+          :code:`enforce_unique_trees_in_queue` is set, this also applies to
+          states whose tree is already in the queue.
+        :param solutions: The solutions found by the worker.
+        :return: Nothing.
+        """
+        with self.lock:
+            self.in_flight[worker] -= num_processed
+            assert self.in_flight[worker] >= 0
+
+            for entry in new_states:
+                self.__push(entry)
+
+            self.solutions.extend(solutions)
+
+    def poll(self) -> Tuple[List[DerivationTree], bool]:
+        """
+        Removes and returns all buffered solutions. If a worker failed (see
+        :meth:`~isla.parallel_solver.FrontierCoordinator.fail`), the exception
+        raised by that worker is raised instead.
+
+        :return: A pair of the buffered solutions and a flag indicating whether
+          the search is finished (i.e., there are no states in the queue and no
+          worker is still processing any state).
+        """
+        with self.lock:
+            if self.failure is not None:
+                raise self.failure
+
+            result = self.solutions
+            self.solutions = []
+            return result, self.__finished()
+
+    def fail(self, worker: int, exc: Exception) -> None:
+        """
+        Called by :code:`worker` if it raised an exception. The coordinator is
+        closed, and the exception is passed on by the next call to
+        :meth:`~isla.parallel_solver.FrontierCoordinator.poll`.
+
+        :param worker: The ID of the failed worker.
+        :param exc: The exception raised by the worker.
+        :return: Nothing.
+        """
+        with self.lock:
+            if self.failure is None:
+                self.failure = exc
+            self.closed = True
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+
+    def __push(self, entry: FrontierEntry) -> None:
+        _, state_hash, tree_hash, _ = entry
+        if state_hash in self.state_hashes_in_queue:
+            return
+
+        if (
+            self.enforce_unique_trees_in_queue
+            and tree_hash in self.tree_hashes_in_queue
+        ):
+            return
+
+        heapq.heappush(self.queue, entry)
+        self.state_hashes_in_queue.add(state_hash)
+        self.tree_hashes_in_queue.add(tree_hash)
+
+    def __finished(self) -> bool:
+        return not self.queue and not any(self.in_flight.values())
+
+
+class FrontierManager(BaseManager):
+    """
+    The broker through which the workers of a
+    :class:`~isla.parallel_solver.WorkSharingISLaSolver` access the shared
+    :class:`~isla.parallel_solver.FrontierCoordinator`. By default, the manager
+    listens on a local socket; passing an :code:`address` to the solver allows
+    for connecting workers on other nodes.
+    """
+
+
+FrontierManager.register("FrontierCoordinator", FrontierCoordinator)
+
+
+class WorkSharingISLaSolver:
+    """
+    Distributes the queue of a single solver run over several worker processes.
+    Different from the :class:`~isla.parallel_solver.ParallelISLaSolver` portfolio,
+    which runs independent searches, the workers of a
+    :class:`~isla.parallel_solver.WorkSharingISLaSolver` share one global priority
+    queue kept by a :class:`~isla.parallel_solver.FrontierCoordinator`. Each worker
+    repeatedly takes a batch of high-priority states, processes them with
+    :meth:`~isla.solver.ISLaSolver.process_state`, and returns the resulting new
+    states and solutions to the coordinator. Thus, states requiring expensive steps
+    (e.g., existential quantifier elimination by tree insertion) do not block the
+    processing of other states.
+
+    Each worker computes the costs of its new states with its own cost computer;
+    coverage information is thus not shared between workers.
+
+    Solutions are obtained by calling
+    :meth:`~isla.parallel_solver.WorkSharingISLaSolver.solve`, which behaves like
+    :meth:`isla.solver.ISLaSolver.solve`. The workers should be stopped by
+    calling :meth:`~isla.parallel_solver.WorkSharingISLaSolver.close`, or by using
+    the solver as a context manager.
+    """
+
+    def __init__(
+        self,
+        grammar: Grammar | str,
+        formula: Optional[language.Formula | str] = None,
+        jobs: Optional[int] = None,
+        seed: int = 0,
+        batch_size: int = 1,
+        max_buffered_solutions: int = 100,
+        address: Optional[Tuple[str, int] | str] = None,
+        **solver_args: Any,
+    ):
+        """
+        :param grammar: The underlying grammar; either, as a "Fuzzing Book"
+          dictionary or in BNF syntax.
+        :param formula: The formula to solve; either a string or a readily parsed
+          formula.
+        :param jobs: The number of worker processes. Defaults to the number of CPUs.
+        :param seed: The random seed of the first worker. Worker :code:`i` uses
+          :code:`seed + i`.
+        :param batch_size: The maximum number of states a worker takes from the
+          coordinator at once.
+        :param max_buffered_solutions: The maximum number of solutions the
+          coordinator buffers before workers have to wait.
+        :param address: The address of the :class:`~isla.parallel_solver.FrontierManager`
+          (see :class:`multiprocessing.managers.BaseManager`). By default, a local
+          address is chosen.
+        :param solver_args: Further arguments to the
+          :class:`~isla.solver.ISLaSolver` constructor. A timeout
+          (:code:`timeout_seconds`) is applied to the overall search.
+        """
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.grammar = grammar
+        self.formula = formula
+        self.jobs = jobs or os.cpu_count() or 1
+        self.seed = seed
+        self.batch_size = batch_size
+        self.max_buffered_solutions = max_buffered_solutions
+        self.address = address
+
+        self.solver_args: Dict[str, Any] = dict(solver_args)
+        self.timeout_seconds: Optional[int] = self.solver_args.pop(
+            "timeout_seconds", None
+        )
+        self.start_time: Optional[float] = None
+
+        self.__manager: Optional[FrontierManager] = None
+        self.__coordinator = None
+        self.__processes: List[mp.Process] = []
+        self.__seen_hashes: Set[int] = set()
+        self.__solutions: Deque[DerivationTree] = deque()
+        self.__finished = False
+
+    def solve(self) -> DerivationTree:
+        """
+        Returns the next solution found by any of the workers that has not been
+        returned before.
+
+        :return: A solution for the ISLa formula passed to the
+          :class:`~isla.parallel_solver.WorkSharingISLaSolver`.
+        """
+        if self.start_time is None:
+            self.start_time = time.time()
+            self.__start_workers()
+
+        while not self.__solutions:
+            if self.__finished:
+                raise StopIteration()
+
+            if (
+                self.timeout_seconds is not None
+                and time.time() - self.start_time > self.timeout_seconds
+            ):
+                self.close()
+                raise TimeoutError(self.timeout_seconds)
+
+            try:
+                solutions, finished = self.__coordinator.poll()
+            except Exception:
+                # A worker failed; its exception is re-raised here.
+                self.close()
+                raise
+            for solution in solutions:
+                tree_hash = solution.structural_hash()
+                if tree_hash not in self.__seen_hashes:
+                    self.__seen_hashes.add(tree_hash)
+                    self.__solutions.append(solution)
+
+            if finished and not self.__solutions:
+                self.close()
+                self.__finished = True
+            elif not solutions:
+                self.__check_workers()
+                time.sleep(0.01)
+
+        return self.__solutions.popleft()
+
+    def close(self) -> None:
+        """
+        Stops all worker processes and the coordinator.
+        """
+        if self.__coordinator is not None:
+            self.__coordinator.close()
+
+        for process in self.__processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.__processes = []
+
+        if self.__manager is not None:
+            self.__manager.shutdown()
+            self.__manager = None
+            self.__coordinator = None
+
+    def __enter__(self) -> "WorkSharingISLaSolver":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __start_workers(self) -> None:
+        # The solver computing the initial states is not used for anything else.
+        initial_solver = ISLaSolver(self.grammar, self.formula, **self.solver_args)
+
+        self.__manager = FrontierManager(address=self.address)
+        self.__manager.start()
+        self.__coordinator = self.__manager.FrontierCoordinator(
+            [pack_frontier_entry(cost, state) for cost, state in initial_solver.queue],
+            self.max_buffered_solutions,
+            initial_solver.enforce_unique_trees_in_queue,
+        )
+
+        for idx in range(self.jobs):
+            process = mp.Process(
+                target=_frontier_worker,
+                args=(
+                    idx,
+                    self.seed + idx,
+                    self.__coordinator,
+                    self.grammar,
+                    self.formula,
+                    self.solver_args,
+                    self.batch_size,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.__processes.append(process)
+
+        self.logger.debug("Started %d work sharing workers", self.jobs)
+
+    def __check_workers(self) -> None:
+        for idx, process in enumerate(self.__processes):
+            if not process.is_alive() and process.exitcode:
+                self.close()
+                raise RuntimeError(
+                    f"Work sharing worker {idx} failed with exit code "
+                    f"{process.exitcode}"
+                )
+
+
+def _frontier_worker(
+    idx: int,
+    seed: int,
+    coordinator: FrontierCoordinator,
+    grammar: Grammar | str,
+    formula: Optional[language.Formula | str],
+    solver_args: Dict[str, Any],
+    batch_size: int,
+) -> None:
+    random.seed(seed)
+
+    try:
+        solver = ISLaSolver(grammar, formula, **solver_args)
+        solver.queue = []
+        solver.queue_cost_epochs = {}
+        # The local queue only holds the states derived from one batch; they are
+        # all returned to the coordinator afterward. Thus, there is nothing to
+        # spill to disk.
+        solver.max_queue_states = None
+        solver.state_hashes_in_queue = set()
+        solver.tree_hashes_in_queue = set()
+
+        while True:
+            batch = coordinator.take_states(idx, batch_size)
+            if batch is None:
+                return
+
+            if not batch:
+                time.sleep(0.01)
+                continue
+
+            for entry in batch:
+                _, state = unpack_frontier_entry(entry)
+                solver.process_state(state)
+
+            coordinator.return_states(
+                idx,
+                len(batch),
+                [pack_frontier_entry(cost, state) for cost, state in solver.queue],
+                list(solver.buffered_solutions),
+            )
+
+            solver.queue = []
+            solver.queue_cost_epochs = {}
+            solver.state_hashes_in_queue = set()
+            solver.tree_hashes_in_queue = set()
+            solver.buffered_solutions.clear()
+    except Exception as exc:
+        coordinator.fail(idx, exc)
@@ -722,15 +722,7 @@ def make_input_generator(
     | Grammar
 ) -> Generator[isla.derivation_tree.DerivationTree, None, None]:
     if isinstance(generator, ISLaSolver):
-
-        def gen():
-            while True:
-                try:
-                    yield generator.solve()
-                except TimeoutError | StopIteration:
-                    return
-
-        return gen()
+        return generator.solutions()
 
     elif isinstance(generator, dict):
         # grammar
@@ -0,0 +1,143 @@
+# Copyright © 2023 CISPA Helmholtz Center for Information Security.
+# Author: Dominic Steinhöfel.
+#
+# This file is part of ISLa.
+#
+# ISLa is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ISLa is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ISLa.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+
+from isla.helpers import Maybe
+
+S = TypeVar("S")
+
+
+@dataclass
+class StageStatistics:
+    """
+    The statistics of one elimination function ("stage") of the solver.
+    """
+
+    # How often the stage was tried.
+    calls: int = 0
+    # How often the stage was applicable (i.e., returned a result).
+    applications: int = 0
+    # The number of states returned by the stage.
+    states_produced: int = 0
+    # The wall time spent in the stage (in seconds), including the time for
+    # operations like Z3 calls triggered by the stage.
+    time: float = 0.0
+
+
+@dataclass
+class OperationStatistics:
+    """
+    The statistics of an operation performed by the solver, such as a Z3 query.
+    """
+
+    calls: int = 0
+    time: float = 0.0
+
+
+class SolverProfiler:
+    """
+    Records where an :class:`~isla.solver.ISLaSolver` spends its time. For each
+    elimination function ("stage") applied to states in
+    :meth:`~isla.solver.ISLaSolver.process_state`, the profiler records the number
+    of calls, the number of applications, the number of produced states, and the
+    spent wall time. Additionally, it measures the time spent in certain operations
+    (Z3 queries, parsing, tree insertion, and cost computation).
+
+    >>> profiler = SolverProfiler()
+    >>> stage = profiler.wrap_stage(lambda n: Maybe([n, n + 1]))
+    >>> stage(1).get()
+    [1, 2]
+    >>> with profiler.measure("z3"):
+    ...     pass
+
+    >>> stats = profiler.stats()
+    >>> stage_stats = stats["stages"]["<lambda>"]
+    >>> stage_stats["calls"], stage_stats["applications"], stage_stats["states_produced"]
+    (1, 1, 2)
+    >>> stats["operations"]["z3"]["calls"]
+    1
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.stages: Dict[str, StageStatistics] = {}
+        self.operations: Dict[str, OperationStatistics] = {}
+
+    def wrap_stage(
+        self, stage: Callable[[S], Maybe[List[S]]]
+    ) -> Callable[[S], Maybe[List[S]]]:
+        """
+        Wraps an elimination function such that its calls are recorded.
+
+        :param stage: The elimination function.
+        :return: The wrapped function.
+        """
+
+        statistics = self.stages.setdefault(stage.__name__, StageStatistics())
+
+        def wrapped(state: S) -> Maybe[List[S]]:
+            start_time = time.perf_counter()
+            try:
+                result = stage(state)
+            finally:
+                statistics.calls += 1
+                statistics.time += time.perf_counter() - start_time
+
+            if result.is_present():
+                statistics.applications += 1
+                statistics.states_produced += len(result.get())
+
+            return result
+
+        wrapped.__name__ = stage.__name__
+        return wrapped
+
+    @contextmanager
+    def measure(self, operation: str) -> Iterator[None]:
+        """
+        Measures the time spent in the body of the :code:`with` statement and
+        accounts it to the given operation.
+
+        :param operation: The name of the operation (e.g., "z3").
+        :return: A context manager.
+        """
+
+        statistics = self.operations.setdefault(operation, OperationStatistics())
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            statistics.calls += 1
+            statistics.time += time.perf_counter() - start_time
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        :return: The recorded statistics as a JSON-serializable dictionary.
+        """
+
+        return {
+            "total_time": time.perf_counter() - self.start_time,
+            "stages": {name: asdict(stats) for name, stats in self.stages.items()},
+            "operations": {
+                name: asdict(stats) for name, stats in self.operations.items()
+            },
+        }
@@ -16,6 +16,7 @@
 # You should have received a copy of the GNU General Public License
 # along with ISLa.  If not, see <http://www.gnu.org/licenses/>.
 
+import contextlib
 import copy
 import functools
 import heapq
@@ -23,10 +24,14 @@ import itertools
 import logging
 import math
 import operator
+import os
 import random
+import struct
 import sys
 import time
+import zlib
 from abc import ABC
+from collections import deque
 from dataclasses import dataclass
 from functools import reduce, lru_cache
 from typing import (
@@ -40,8 +45,14 @@ from typing import (
     Callable,
     Iterable,
     Sequence,
+    Any,
+    BinaryIO,
+    Iterator,
+    Deque,
+    ContextManager,
 )
 
+import dill
 import pkg_resources
 import z3
 from grammar_graph import gg
@@ -115,9 +126,11 @@ from isla.language import (
 )
 from isla.mutator import Mutator
 from isla.parser import EarleyParser
+from isla.profiler import SolverProfiler
+from isla.solver_queue import SpilledQueue
 from isla.type_defs import Grammar, Path, ImmutableList, CanonicalGrammar
 from isla.z3_helpers import (
-    z3_solve,
+    Z3Session,
     z3_subst,
     z3_eq,
     z3_and,
@@ -161,11 +174,18 @@ class SolutionState:
     def __hash__(self):
         if self.__hash is None:
             result = hash((self.constraint, self.tree))
-            object.__setattr__(self, "__hash", result)
+            object.__setattr__(self, "_SolutionState__hash", result)
             return result
 
         return self.__hash
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # String hashes are salted differently in each Python process; thus,
+        # we do not persist the cached hash value.
+        result = dict(self.__dict__)
+        result["_SolutionState__hash"] = None
+        return result
+
     def __eq__(self, other):
         return (
             isinstance(other, SolutionState)
@@ -263,6 +283,44 @@ class SemanticError(Exception):
     pass
 
 
+@dataclass(frozen=True)
+class InvalidNumericSolutionError(RuntimeError):
+    """
+    Raised if Z3 assigns a value to an "int" variable that is not in the language
+    of the variable's nonterminal type.
+    """
+
+    variable: language.Variable
+    value: int
+
+    def __str__(self):
+        return (
+            "Could not parse a numeric solution "
+            + f"({self.value}) for variable "
+            + f"{self.variable} of type '{self.variable.n_type}'; try "
+            + "running the solver without optimized Z3 queries or make "
+            + "sure that ranges are restricted to syntactically valid "
+            + "ones (according to the grammar)."
+        )
+
+
+@dataclass(frozen=True)
+class SMTSession:
+    """
+    A Z3 session for enumerating solutions of SMT formulas with language
+    constraints (see
+    :meth:`~isla.solver.ISLaSolver.create_smt_session`). Besides the Z3 session,
+    it stores which variables only occur in "length" or "int" contexts and the
+    fresh integer variables representing those.
+    """
+
+    z3_session: Z3Session
+    variables: Set[language.Variable]
+    fresh_var_map: Dict[language.Variable, z3.ExprRef]
+    length_vars: Set[language.Variable]
+    int_vars: Set[language.Variable]
+
+
 @dataclass(frozen=True)
 class SolverDefaults:
     formula: Optional[language.Formula | str] = None
@@ -292,6 +350,8 @@ class SolverDefaults:
     initial_tree: Maybe[DerivationTree] = Maybe.nothing()
     enable_optimized_z3_queries: bool = True
     start_symbol: Optional[str] = None
+    max_queue_states: Optional[int] = None
+    profile: bool = False
 
 
 _DEFAULTS = SolverDefaults()
@@ -345,6 +405,8 @@ class ISLaSolver:
         initial_tree: Maybe[DerivationTree] = _DEFAULTS.initial_tree,
         enable_optimized_z3_queries: bool = _DEFAULTS.enable_optimized_z3_queries,
         start_symbol: Optional[str] = _DEFAULTS.start_symbol,
+        max_queue_states: Optional[int] = _DEFAULTS.max_queue_states,
+        profile: bool = _DEFAULTS.profile,
     ):
         """
         The constructor of :class:`~isla.solver.ISLaSolver` accepts a large number of
@@ -438,8 +500,18 @@ class ISLaSolver:
           a start symbol different form `<start>`. If `start_symbol` is provided, a tree
           consisting of a single root node with the value of `start_symbol` is chosen as
           initial tree.
+        :param max_queue_states: The maximum number of states kept in the in-memory
+          queue. If the queue grows beyond this bound, its more costly half is
+          spilled to an on-disk store (see :class:`~isla.solver_queue.SpilledQueue`),
+          from which states are paged back in when the in-memory queue runs dry.
+          If None (the default), the queue is not bounded.
+        :param profile: If True, the solver records the time spent in each
+          elimination function and in operations like Z3 queries and parsing
+          (see :class:`~isla.profiler.SolverProfiler`). The results are available
+          via :meth:`~isla.solver.ISLaSolver.stats`.
         """
         self.logger = logging.getLogger(type(self).__name__)
+        self.profiler: Optional[SolverProfiler] = SolverProfiler() if profile else None
 
         # We require at least z3 4.8.13.0. ISLa might work for some older versions, but
         # at least for 4.8.8.0, we have witnessed that certain rather easy constraints,
@@ -553,6 +625,10 @@ class ISLaSolver:
         self.max_number_tree_insertion_results = max_number_tree_insertion_results
         self.enforce_unique_trees_in_queue = enforce_unique_trees_in_queue
 
+        assert max_queue_states is None or max_queue_states > 1
+        self.max_queue_states = max_queue_states
+        self.spilled_queue: Optional[SpilledQueue] = None
+
         # Initialize Queue
         self.initial_tree = (
             initial_tree
@@ -579,11 +655,18 @@ class ISLaSolver:
         initial_state = SolutionState(initial_formula, self.initial_tree)
         initial_states = self.establish_invariant(initial_state)
 
+        # Costs in the queue are updated lazily: `recompute_costs` increments the
+        # cost epoch, and states whose costs have been computed in an older epoch
+        # are re-ranked when they are popped from the queue (see `pop_state`).
+        self.cost_epoch: int = 0
+        self.queue_cost_epochs: Dict[int, int] = {}
+        self.cost_computer_resets: int = self.cost_computer.num_resets()
+
         self.queue: List[Tuple[float, SolutionState]] = []
         self.tree_hashes_in_queue: Set[int] = {self.initial_tree.structural_hash()}
         self.state_hashes_in_queue: Set[int] = {hash(state) for state in initial_states}
         for state in initial_states:
-            heapq.heappush(self.queue, (self.compute_cost(state), state))
+            self.push_state(self.compute_cost(state), state)
 
         self.seen_coverages: Set[str] = set()
         self.current_level: int = 0
@@ -592,7 +675,7 @@ class ISLaSolver:
 
         self.regex_cache = {}
 
-        self.solutions: List[DerivationTree] = []
+        self.buffered_solutions: Deque[DerivationTree] = deque()
 
         # Debugging stuff
         self.debug = debug
@@ -621,45 +704,109 @@ class ISLaSolver:
         The timeout can be controlled by the :code:`timeout_seconds`
         :meth:`constructor <isla.solver.ISLaSolver.__init__>` parameter.
 
+        To obtain many solutions, consider using
+        :meth:`~isla.solver.ISLaSolver.solutions` or
+        :meth:`~isla.solver.ISLaSolver.solve_many`.
+
         :return: A solution for the ISLa formula passed to the
           :class:`isla.solver.ISLaSolver`.
         """
+
+        return self.solve_many(1)[0]
+
+    def solve_many(
+        self, n: int, deadline: Optional[float] = None
+    ) -> List[DerivationTree]:
+        """
+        Computes up to :code:`n` solutions in one call. Fewer solutions are returned
+        if the search space is exhausted, a timeout occurs, or the :code:`deadline`
+        passes. If not a single solution can be returned, a :class:`StopIteration`
+        (no more solutions) or :class:`TimeoutError` (timeout or passed deadline) is
+        raised, as for :meth:`~isla.solver.ISLaSolver.solve`.
+
+        >>> import random
+        >>> random.seed(1)
+
+        >>> import string
+        >>> from isla.solver import ISLaSolver
+        >>> LANG_GRAMMAR = {
+        ...     "<start>":
+        ...         ["<stmt>"],
+        ...     "<stmt>":
+        ...         ["<assgn> ; <stmt>", "<assgn>"],
+        ...     "<assgn>":
+        ...         ["<var> := <rhs>"],
+        ...     "<rhs>":
+        ...         ["<var>", "<digit>"],
+        ...     "<var>": list(string.ascii_lowercase),
+        ...     "<digit>": list(string.digits)
+        ... }
+        >>> solver = ISLaSolver(LANG_GRAMMAR, max_number_free_instantiations=4)
+        >>> len(solver.solve_many(3))
+        3
+
+        There are only four solutions for this solver, so the next batch is smaller.
+
+        >>> len(solver.solve_many(3))
+        1
+        >>> solver.solve_many(3)
+        Traceback (most recent call last):
+        ...
+        StopIteration
+
+        :param n: The maximum number of solutions to return.
+        :param deadline: An optional point in time (as returned by
+          :func:`time.time`) after which no further solver steps are performed.
+        :return: A non-empty list of at most :code:`n` solutions.
+        """
+
+        assert n > 0
+
         if self.timeout_seconds is not None and self.start_time is None:
             self.start_time = int(time.time())
 
-        while self.queue:
+        # We compute the point in time of the solver timeout once per call instead
+        # of once per solver step.
+        timeout_time = (
+            None
+            if self.timeout_seconds is None
+            else self.start_time + self.timeout_seconds
+        )
+
+        result: List[DerivationTree] = []
+
+        while (self.queue or self.spilled_queue) and len(result) < n:
             self.step_cnt += 1
 
-            # import dill as pickle
             # state_hash = 9107154106757938105
             # out_file = "/tmp/saved_debug_state"
             # if hash(self.queue[0][1]) == state_hash:
-            #     with open(out_file, 'wb') as debug_state_file:
-            #         pickle.dump(self, debug_state_file)
+            #     self.checkpoint(out_file)
             #     print(f"Dumping state to {out_file}")
             #     exit()
 
-            if self.timeout_seconds is not None:
-                if int(time.time()) - self.start_time > self.timeout_seconds:
-                    self.logger.debug("TIMEOUT")
-                    raise TimeoutError(self.timeout_seconds)
+            if timeout_time is not None and int(time.time()) > timeout_time:
+                self.logger.debug("TIMEOUT")
+                if result:
+                    return result
+                raise TimeoutError(self.timeout_seconds)
+
+            if deadline is not None and time.time() > deadline:
+                self.logger.debug("DEADLINE PASSED")
+                if result:
+                    return result
+                raise TimeoutError(deadline)
 
-            if self.solutions:
-                solution = self.solutions.pop(0)
+            if self.buffered_solutions:
+                solution = self.buffered_solutions.popleft()
                 self.logger.debug('Found solution "%s"', solution)
-                return solution
+                result.append(solution)
+                continue
 
             cost: int
             state: SolutionState
-            cost, state = heapq.heappop(self.queue)
-
-            self.current_level = state.level
-            self.tree_hashes_in_queue.discard(state.tree.structural_hash())
-            self.state_hashes_in_queue.discard(hash(state))
+            cost, state = self.pop_state()
 
-            if self.debug:
-                self.current_state = state
-                self.state_tree.setdefault(state, [])
             self.logger.debug(
                 "Polling new state (%s, %s) (hash %d, cost %f)",
                 state.constraint,
@@ -669,45 +816,211 @@ class ISLaSolver:
             )
             self.logger.debug("Queue length: %s", len(self.queue))
 
-            assert not isinstance(state.constraint, language.DisjunctiveFormula)
+            self.process_state(state)
 
-            # Instantiate all top-level structural predicate formulas.
-            state = self.instantiate_structural_predicates(state)
+        while self.buffered_solutions and len(result) < n:
+            solution = self.buffered_solutions.popleft()
+            self.logger.debug('Found solution "%s"', solution)
+            result.append(solution)
 
-            # Apply the first elimination function that is applicable.
-            # The later ones are ignored.
-            monad = chain_functions(
-                [
-                    self.noop_on_false_constraint,
-                    self.eliminate_existential_integer_quantifiers,
-                    self.instantiate_universal_integer_quantifiers,
-                    self.match_all_universal_formulas,
-                    self.expand_to_match_quantifiers,
-                    self.eliminate_all_semantic_formulas,
-                    self.eliminate_all_ready_semantic_predicate_formulas,
-                    self.eliminate_and_match_first_existential_formula_and_expand,
-                    self.assert_remaining_formulas_are_lazy_binding_semantic,
-                    self.finish_unconstrained_trees,
-                    self.expand,
-                ],
-                state,
-            )
+        if not result:
+            self.logger.debug("UNSAT")
+            raise StopIteration()
 
-            def process_and_extend_solutions(
-                result_states: List[SolutionState],
-            ) -> None:
-                assert result_states is not None
-                self.solutions.extend(self.process_new_states(result_states))
+        return result
 
-            monad.if_present(process_and_extend_solutions)
+    def solutions(
+        self, limit: Optional[int] = None, deadline: Optional[float] = None
+    ) -> Iterator[DerivationTree]:
+        """
+        Generates solutions until the search space is exhausted, a timeout occurs,
+        :code:`limit` solutions have been produced, or the :code:`deadline` passes.
+        In contrast to :meth:`~isla.solver.ISLaSolver.solve`, no exceptions are
+        raised in these cases; the generator simply ends. Solutions found by the
+        same solver step are passed on as one batch, while each solution is still
+        yielded as soon as it is available.
 
-        if self.solutions:
-            solution = self.solutions.pop(0)
-            self.logger.debug('Found solution "%s"', solution)
-            return solution
-        else:
-            self.logger.debug("UNSAT")
-            raise StopIteration()
+        >>> import random
+        >>> random.seed(1)
+
+        >>> import string
+        >>> from isla.solver import ISLaSolver
+        >>> LANG_GRAMMAR = {
+        ...     "<start>":
+        ...         ["<stmt>"],
+        ...     "<stmt>":
+        ...         ["<assgn> ; <stmt>", "<assgn>"],
+        ...     "<assgn>":
+        ...         ["<var> := <rhs>"],
+        ...     "<rhs>":
+        ...         ["<var>", "<digit>"],
+        ...     "<var>": list(string.ascii_lowercase),
+        ...     "<digit>": list(string.digits)
+        ... }
+        >>> solver = ISLaSolver(LANG_GRAMMAR, 'forall <var> var: var = "x"')
+        >>> len(list(solver.solutions(limit=5)))
+        5
+        >>> all(solver.check(solution) for solution in solver.solutions(limit=10))
+        True
+
+        :param limit: The maximum number of solutions to generate, if any.
+        :param deadline: An optional point in time (as returned by
+          :func:`time.time`) after which no further solver steps are performed.
+        :return: A generator of solutions.
+        """
+
+        num_solutions = 0
+        while limit is None or num_solutions < limit:
+            # Request all readily computed solutions at once, or wait for one.
+            batch_size = max(1, len(self.buffered_solutions))
+            if limit is not None:
+                batch_size = min(batch_size, limit - num_solutions)
+
+            try:
+                batch = self.solve_many(batch_size, deadline)
+            except (StopIteration, TimeoutError):
+                return
+
+            num_solutions += len(batch)
+            yield from batch
+
+    def search_exhausted(self) -> bool:
+        """
+        Checks whether the search space has been exhausted, i.e., the queue is empty
+        and no computed solution is waiting to be returned. After that, all calls to
+        :meth:`~isla.solver.ISLaSolver.solve` raise a :class:`StopIteration`. In
+        contrast to a timeout, this means that there are no further solutions.
+
+        :return: True iff there are no more solutions.
+        """
+
+        return not self.queue and not self.spilled_queue and not self.buffered_solutions
+
+    def process_state(self, state: SolutionState) -> None:
+        """
+        Performs a single solver step for a state that has been taken from the
+        queue: The first applicable elimination function is applied to
+        :code:`state`. Resulting incomplete states are added to the queue, solutions
+        to :code:`self.buffered_solutions`.
+
+        This method is called by :meth:`~isla.solver.ISLaSolver.solve`; it is
+        exposed to allow for distributing the states in the queue over several
+        solver instances (see :class:`~isla.parallel_solver.WorkSharingISLaSolver`).
+
+        :param state: The state to process.
+        :return: Nothing.
+        """
+        self.current_level = state.level
+        self.tree_hashes_in_queue.discard(state.tree.structural_hash())
+        self.state_hashes_in_queue.discard(hash(state))
+
+        if self.debug:
+            self.current_state = state
+            self.state_tree.setdefault(state, [])
+
+        assert not isinstance(state.constraint, language.DisjunctiveFormula)
+
+        # Instantiate all top-level structural predicate formulas.
+        state = self.instantiate_structural_predicates(state)
+
+        # Apply the first elimination function that is applicable.
+        # The later ones are ignored.
+        elimination_functions = [
+            self.noop_on_false_constraint,
+            self.eliminate_existential_integer_quantifiers,
+            self.instantiate_universal_integer_quantifiers,
+            self.match_all_universal_formulas,
+            self.expand_to_match_quantifiers,
+            self.eliminate_all_semantic_formulas,
+            self.eliminate_all_ready_semantic_predicate_formulas,
+            self.eliminate_and_match_first_existential_formula_and_expand,
+            self.assert_remaining_formulas_are_lazy_binding_semantic,
+            self.finish_unconstrained_trees,
+            self.expand,
+        ]
+
+        if self.profiler is not None:
+            elimination_functions = [
+                self.profiler.wrap_stage(f) for f in elimination_functions
+            ]
+
+        monad = chain_functions(elimination_functions, state)
+
+        def process_and_extend_solutions(
+            result_states: List[SolutionState],
+        ) -> None:
+            assert result_states is not None
+            self.buffered_solutions.extend(self.process_new_states(result_states))
+
+        monad.if_present(process_and_extend_solutions)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns statistics about the search so far: the number of solver steps, the
+        size of the queue, and, if the solver has been created with
+        :code:`profile=True`, the profiling results of
+        :class:`~isla.profiler.SolverProfiler` (for each elimination function, the
+        number of calls and applications, the number of produced states, and the
+        spent time; and the time spent in Z3 queries, parsing, tree insertion, and
+        cost computation).
+
+        >>> import string
+        >>> LANG_GRAMMAR = {
+        ...     "<start>":
+        ...         ["<stmt>"],
+        ...     "<stmt>":
+        ...         ["<assgn> ; <stmt>", "<assgn>"],
+        ...     "<assgn>":
+        ...         ["<var> := <rhs>"],
+        ...     "<rhs>":
+        ...         ["<var>", "<digit>"],
+        ...     "<var>": list(string.ascii_lowercase),
+        ...     "<digit>": list(string.digits)
+        ... }
+        >>> solver = ISLaSolver(
+        ...     LANG_GRAMMAR, 'forall <var> var: var = "x"', profile=True)
+        >>> _ = solver.solve()
+
+        >>> stats = solver.stats()
+        >>> stats["steps"] > 0
+        True
+        >>> stats["stages"]["eliminate_all_semantic_formulas"]["applications"] > 0
+        True
+        >>> stats["operations"]["z3"]["calls"] > 0
+        True
+
+        The result can be serialized to JSON.
+
+        >>> import json
+        >>> _ = json.dumps(stats)
+
+        :return: A dictionary with statistics.
+        """
+
+        result = {
+            "steps": self.step_cnt,
+            "queue_length": len(self.queue),
+            "spilled_states": len(self.spilled_queue or []),
+        }
+
+        if self.profiler is not None:
+            result |= self.profiler.stats()
+
+        return result
+
+    def profile_operation(self, operation: str) -> ContextManager[None]:
+        """
+        Returns a context manager measuring the time spent in the given operation
+        if profiling is enabled, and a context manager that does nothing otherwise.
+
+        :param operation: The name of the operation (e.g., "z3").
+        :return: A context manager.
+        """
+
+        if self.profiler is None:
+            return contextlib.nullcontext()
+
+        return self.profiler.measure(operation)
 
     def check(self, inp: DerivationTree | str) -> bool:
         """
@@ -764,7 +1077,8 @@ class ISLaSolver:
 
         parser = EarleyParser(grammar)
         try:
-            parse_tree = next(parser.parse(inp))
+            with self.profile_operation("parsing"):
+                parse_tree = next(parser.parse(inp))
             if nonterminal != "<start>":
                 parse_tree = parse_tree[1][0]
             tree = DerivationTree.from_parse_tree(parse_tree)
@@ -935,6 +1249,8 @@ class ISLaSolver:
         initial_tree: Maybe[DerivationTree] = Maybe.nothing(),
         enable_optimized_z3_queries: Maybe[bool] = Maybe.nothing(),
         start_symbol: Optional[str] = None,
+        max_queue_states: Maybe[Optional[int]] = Maybe.nothing(),
+        profile: Maybe[bool] = Maybe.nothing(),
     ):
         result = ISLaSolver(
             grammar=grammar.orelse(lambda: self.grammar).get(),
@@ -973,12 +1289,190 @@ class ISLaSolver:
                 lambda: self.enable_optimized_z3_queries
             ).get(),
             start_symbol=start_symbol,
+            max_queue_states=max_queue_states.orelse(lambda: self.max_queue_states).a,
+            profile=profile.orelse(lambda: self.profiler is not None).get(),
         )
 
         result.regex_cache = self.regex_cache
 
         return result
 
+    def checkpoint(self, path: str) -> None:
+        """
+        Writes the current search state of this solver to the file at :code:`path`.
+        The solver can be reconstructed from that file using
+        :meth:`~isla.solver.ISLaSolver.resume` (also in a different process) and
+        will then continue the search where this solver stopped.
+
+        The checkpoint consists of a sequence of independently compressed records:
+        the solver configuration, the search counters and coverage information, the
+        pending solutions, and one record per queue entry. Records are streamed to
+        the file; thus, there is no need to hold a serialized copy of the whole
+        queue in memory. The file is replaced atomically.
+
+        >>> import random
+        >>> random.seed(1)
+
+        >>> import os
+        >>> import string
+        >>> import tempfile
+        >>> from isla.solver import ISLaSolver
+        >>> LANG_GRAMMAR = {
+        ...     "<start>":
+        ...         ["<stmt>"],
+        ...     "<stmt>":
+        ...         ["<assgn> ; <stmt>", "<assgn>"],
+        ...     "<assgn>":
+        ...         ["<var> := <rhs>"],
+        ...     "<rhs>":
+        ...         ["<var>", "<digit>"],
+        ...     "<var>": list(string.ascii_lowercase),
+        ...     "<digit>": list(string.digits)
+        ... }
+        >>> solver = ISLaSolver(LANG_GRAMMAR, 'forall <var> var: var = "x"')
+        >>> solver.check(solver.solve())
+        True
+
+        >>> path = os.path.join(tempfile.mkdtemp(), "solver.ckpt")
+        >>> solver.checkpoint(path)
+        >>> resumed = ISLaSolver.resume(path)
+        >>> len(resumed.queue) == len(solver.queue)
+        True
+        >>> solution = resumed.solve()
+        >>> resumed.check(solution)
+        True
+
+        Timeouts start anew after resuming. The state of the global fuzzer
+        (:code:`global_fuzzer=True`) is not persisted.
+
+        :param path: The file to which the checkpoint is written.
+        :return: Nothing.
+        """
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as out_file:
+            out_file.write(CHECKPOINT_MAGIC)
+            out_file.write(struct.pack(">H", CHECKPOINT_FORMAT_VERSION))
+
+            write_checkpoint_record(
+                out_file,
+                CHECKPOINT_SETTINGS,
+                {
+                    "grammar": self.grammar,
+                    "formula": self.formula,
+                    "max_number_free_instantiations": self.max_number_free_instantiations,
+                    "max_number_smt_instantiations": self.max_number_smt_instantiations,
+                    "max_number_tree_insertion_results": self.max_number_tree_insertion_results,
+                    "enforce_unique_trees_in_queue": self.enforce_unique_trees_in_queue,
+                    "debug": self.debug,
+                    "cost_computer": self.cost_computer,
+                    "timeout_seconds": self.timeout_seconds,
+                    "global_fuzzer": self.global_fuzzer,
+                    "predicates_unique_in_int_arg": tuple(
+                        self.predicates_unique_in_int_arg
+                    ),
+                    "fuzzer_factory": self.fuzzer_factory,
+                    "tree_insertion_methods": self.tree_insertion_methods,
+                    "activate_unsat_support": self.activate_unsat_support,
+                    "grammar_unwinding_threshold": self.grammar_unwinding_threshold,
+                    "initial_tree": Maybe(self.initial_tree),
+                    "enable_optimized_z3_queries": self.enable_optimized_z3_queries,
+                    "max_queue_states": self.max_queue_states,
+                    "profile": self.profiler is not None,
+                },
+            )
+
+            write_checkpoint_record(
+                out_file,
+                CHECKPOINT_SEARCH_STATE,
+                {
+                    "seen_coverages": self.seen_coverages,
+                    "current_level": self.current_level,
+                    "step_cnt": self.step_cnt,
+                    "last_cost_recomputation": self.last_cost_recomputation,
+                    "cost_epoch": self.cost_epoch,
+                },
+            )
+
+            for solution in self.buffered_solutions:
+                write_checkpoint_record(out_file, CHECKPOINT_SOLUTION, solution)
+
+            # State hashes differ between processes, so we store the cost epoch
+            # of each queue entry with the entry instead of persisting the
+            # `queue_cost_epochs` dictionary.
+            for cost, state in self.queue:
+                write_checkpoint_record(
+                    out_file,
+                    CHECKPOINT_QUEUE_ENTRY,
+                    (
+                        cost,
+                        state,
+                        self.queue_cost_epochs.get(hash(state), self.cost_epoch),
+                    ),
+                )
+
+            for cost, state, _, _, epoch in self.spilled_queue or []:
+                write_checkpoint_record(
+                    out_file, CHECKPOINT_QUEUE_ENTRY, (cost, state, epoch)
+                )
+
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def resume(path: str) -> "ISLaSolver":
+        """
+        Reconstructs a solver from a checkpoint written by
+        :meth:`~isla.solver.ISLaSolver.checkpoint`. See there for an example.
+
+        :param path: The checkpoint file.
+        :return: A solver continuing the search of the checkpointed solver.
+        """
+
+        with open(path, "rb") as in_file:
+            magic = in_file.read(len(CHECKPOINT_MAGIC))
+            if magic != CHECKPOINT_MAGIC:
+                raise ValueError(f"{path} is not an ISLa solver checkpoint")
+
+            (format_version,) = struct.unpack(">H", in_file.read(2))
+            if format_version != CHECKPOINT_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported checkpoint format version {format_version} "
+                    + f"(expected {CHECKPOINT_FORMAT_VERSION})"
+                )
+
+            records = read_checkpoint_records(in_file)
+
+            kind, settings = next(records)
+            assert kind == CHECKPOINT_SETTINGS
+            result = ISLaSolver(**settings)
+
+            result.queue = []
+            result.queue_cost_epochs = {}
+            if result.spilled_queue is not None:
+                result.spilled_queue.close()
+                result.spilled_queue = None
+            result.tree_hashes_in_queue = set()
+            result.state_hashes_in_queue = set()
+
+            for kind, payload in records:
+                if kind == CHECKPOINT_SEARCH_STATE:
+                    result.seen_coverages = payload["seen_coverages"]
+                    result.current_level = payload["current_level"]
+                    result.step_cnt = payload["step_cnt"]
+                    result.last_cost_recomputation = payload["last_cost_recomputation"]
+                    result.cost_epoch = payload["cost_epoch"]
+                elif kind == CHECKPOINT_SOLUTION:
+                    result.buffered_solutions.append(payload)
+                elif kind == CHECKPOINT_QUEUE_ENTRY:
+                    cost, state, epoch = payload
+                    result.tree_hashes_in_queue.add(state.tree.structural_hash())
+                    result.state_hashes_in_queue.add(hash(state))
+                    result.push_state(cost, state, epoch)
+                else:
+                    raise ValueError(f"Unknown checkpoint record kind {kind}")
+
+        return result
+
     @staticmethod
     def noop_on_false_constraint(
         state: SolutionState,
@@ -2069,14 +2563,15 @@ class ISLaSolver:
                 self.max_number_tree_insertion_results,
             )
 
-            insertion_results = insert_tree(
-                self.canonical_grammar,
-                inserted_tree,
-                existential_formula.in_variable,
-                graph=self.graph,
-                max_num_solutions=self.max_number_tree_insertion_results * 2,
-                methods=self.tree_insertion_methods,
-            )
+            with self.profile_operation("insert_tree"):
+                insertion_results = insert_tree(
+                    self.canonical_grammar,
+                    inserted_tree,
+                    existential_formula.in_variable,
+                    graph=self.graph,
+                    max_num_solutions=self.max_number_tree_insertion_results * 2,
+                    methods=self.tree_insertion_methods,
+                )
 
             insertion_results = sorted(
                 insertion_results,
@@ -2391,19 +2886,17 @@ class ISLaSolver:
         solutions: List[
             Dict[Union[language.Constant, DerivationTree], DerivationTree]
         ] = []
-        internal_solutions: List[Dict[language.Constant, z3.StringVal]] = []
+
+        # We set up the solver once and add a blocking clause for each solution.
+        session = self.create_smt_session(
+            constants,
+            tuple([smt_formula.formula for smt_formula in smt_formulas]),
+            tree_substitutions,
+        )
 
         num_instantiations = max_instantiations or self.max_number_smt_instantiations
         for _ in range(num_instantiations):
-            (
-                solver_result,
-                maybe_model,
-            ) = self.solve_smt_formulas_with_language_constraints(
-                constants,
-                tuple([smt_formula.formula for smt_formula in smt_formulas]),
-                tree_substitutions,
-                internal_solutions,
-            )
+            solver_result, maybe_model = self.solve_smt_session(session)
 
             if solver_result != z3.sat:
                 if not solutions:
@@ -2431,7 +2924,7 @@ class ISLaSolver:
             else:
                 solutions.append(new_solution)
                 if new_internal_solution:
-                    internal_solutions.append(new_internal_solution)
+                    self.exclude_smt_solution(session, new_internal_solution)
                 else:
                     # Again, for a trivial solution (e.g., True), the assignment
                     # can be empty.
@@ -2446,6 +2939,43 @@ class ISLaSolver:
         tree_substitutions: Dict[language.Variable, DerivationTree],
         solutions_to_exclude: List[Dict[language.Variable, z3.StringVal]],
     ) -> Tuple[z3.CheckSatResult, Dict[language.Variable, DerivationTree]]:
+        """
+        Solves the given SMT formulas, respecting the language constraints for the
+        variables, and excluding the given previous solutions. To enumerate several
+        solutions, it is more efficient to create one session with
+        :meth:`~isla.solver.ISLaSolver.create_smt_session` and to use
+        :meth:`~isla.solver.ISLaSolver.solve_smt_session` and
+        :meth:`~isla.solver.ISLaSolver.exclude_smt_solution`.
+
+        :param variables: The variables in the formulas.
+        :param smt_formulas: The formulas to solve.
+        :param tree_substitutions: The trees the variables are substituted with.
+        :param solutions_to_exclude: Previous solutions to exclude.
+        :return: The result of the Z3 query and, if it is "sat", a solution.
+        """
+
+        session = self.create_smt_session(variables, smt_formulas, tree_substitutions)
+        for prev_solution in solutions_to_exclude:
+            self.exclude_smt_solution(session, prev_solution)
+
+        return self.solve_smt_session(session)
+
+    def create_smt_session(
+        self,
+        variables: Set[language.Variable],
+        smt_formulas: ImmutableList[z3.BoolRef],
+        tree_substitutions: Dict[language.Variable, DerivationTree],
+    ) -> SMTSession:
+        """
+        Creates a Z3 session for the given SMT formulas. The session contains the
+        formulas as well as the language constraints for the variables.
+
+        :param variables: The variables in the formulas.
+        :param smt_formulas: The formulas to solve.
+        :param tree_substitutions: The trees the variables are substituted with.
+        :return: The session.
+        """
+
         # We disable optimized Z3 queries if the SMT formulas contain "too concrete"
         # substitutions, that is, substitutions with a tree that is not merely an
         # open leaf. Example: we have a constrained `str.len(<chars>) < 10` and a
@@ -2513,31 +3043,82 @@ class ISLaSolver:
             ]
         )
 
-        for prev_solution in solutions_to_exclude:
-            prev_solution_formula = z3_and(
-                [
-                    self.previous_solution_formula(
-                        var, string_val, fresh_var_map, length_vars, int_vars
-                    )
-                    for var, string_val in prev_solution.items()
-                ]
-            )
+        return SMTSession(
+            Z3Session(formulas),
+            set(variables),
+            fresh_var_map,
+            length_vars,
+            int_vars,
+        )
+
+    def solve_smt_session(
+        self, session: SMTSession
+    ) -> Tuple[z3.CheckSatResult, Dict[language.Variable, DerivationTree]]:
+        """
+        Queries Z3 for a solution of the formulas in the given session.
 
-            formulas.append(z3.Not(prev_solution_formula))
+        :param session: The session.
+        :return: The result of the Z3 query and, if it is "sat", a solution.
+        """
 
-        sat_result, maybe_model = z3_solve(formulas)
+        for _ in range(MAX_INVALID_NUMERIC_SOLUTIONS):
+            with self.profile_operation("z3"):
+                sat_result, maybe_model = session.z3_session.check()
 
-        if sat_result != z3.sat:
-            return sat_result, {}
+            if sat_result != z3.sat:
+                return sat_result, {}
 
-        assert maybe_model is not None
+            assert maybe_model is not None
 
-        return sat_result, {
-            var: self.extract_model_value(
-                var, maybe_model, fresh_var_map, length_vars, int_vars
+            try:
+                return sat_result, {
+                    var: self.extract_model_value(
+                        var,
+                        maybe_model,
+                        session.fresh_var_map,
+                        session.length_vars,
+                        session.int_vars,
+                    )
+                    for var in session.variables
+                }
+            except InvalidNumericSolutionError as err:
+                # Since "int" variables are represented by unconstrained integers,
+                # Z3 may choose values outside the variable's language (e.g., "10"
+                # for a digit). We exclude such a value and query again.
+                session.z3_session.block(
+                    z3_eq(session.fresh_var_map[err.variable], z3.IntVal(err.value))
+                )
+                last_error = err
+
+        raise last_error
+
+    def exclude_smt_solution(
+        self,
+        session: SMTSession,
+        solution: Dict[language.Variable, z3.StringVal],
+    ) -> None:
+        """
+        Adds a blocking clause for the given solution to the session.
+
+        :param session: The session.
+        :param solution: The solution to exclude.
+        :return: Nothing.
+        """
+
+        session.z3_session.block(
+            z3_and(
+                [
+                    self.previous_solution_formula(
+                        var,
+                        string_val,
+                        session.fresh_var_map,
+                        session.length_vars,
+                        session.int_vars,
+                    )
+                    for var, string_val in solution.items()
+                ]
             )
-            for var in variables
-        }
+        )
 
     @staticmethod
     def previous_solution_formula(
@@ -2813,13 +3394,8 @@ class ISLaSolver:
                 )
 
                 if z3_solver.check() != z3.sat:
-                    raise RuntimeError(
-                        "Could not parse a numeric solution "
-                        + f"({model[fresh_var_map[var]].as_long()}) for variable "
-                        + f"{var} of type '{var.n_type}'; try "
-                        + "running the solver without optimized Z3 queries or make "
-                        + "sure that ranges are restricted to syntactically valid "
-                        + "ones (according to the grammar).",
+                    raise InvalidNumericSolutionError(
+                        var, model[fresh_var_map[var]].as_long()
                     )
 
                 return self.parse(
@@ -3064,12 +3640,16 @@ class ISLaSolver:
                     old_start_time = self.start_time
                     old_timeout_seconds = self.timeout_seconds
                     old_queue = list(self.queue)
-                    old_solutions = list(self.solutions)
+                    old_queue_cost_epochs = self.queue_cost_epochs
+                    old_spilled_queue = self.spilled_queue
+                    old_solutions = self.buffered_solutions
 
                     self.queue = []
-                    self.solutions = []
+                    self.queue_cost_epochs = {}
+                    self.spilled_queue = None
+                    self.buffered_solutions = deque()
                     check_state = SolutionState(existential_formula, new_state.tree)
-                    heapq.heappush(self.queue, (0, check_state))
+                    self.push_state(0, check_state)
                     self.start_time = int(time.time())
                     self.timeout_seconds = 2
 
@@ -3087,7 +3667,11 @@ class ISLaSolver:
                         self.start_time = old_start_time
                         self.timeout_seconds = old_timeout_seconds
                         self.queue = old_queue
-                        self.solutions = old_solutions
+                        self.queue_cost_epochs = old_queue_cost_epochs
+                        if self.spilled_queue is not None:
+                            self.spilled_queue.close()
+                        self.spilled_queue = old_spilled_queue
+                        self.buffered_solutions = old_solutions
 
             self.currently_unsat_checking = False
 
@@ -3108,6 +3692,13 @@ class ISLaSolver:
         for tree in solution_trees:
             self.cost_computer.signal_tree_output(tree)
 
+        if self.cost_computer.num_resets() != self.cost_computer_resets:
+            # The cost computer reset its internal information (e.g., the global
+            # coverage), such that the costs of the states in the queue may have
+            # decreased. We re-rank them lazily (see `pop_state`).
+            self.cost_computer_resets = self.cost_computer.num_resets()
+            self.cost_epoch += 1
+
         return solution_trees
 
     def state_is_valid_or_enqueue(self, state: SolutionState) -> bool:
@@ -3136,9 +3727,8 @@ class ISLaSolver:
         self.assert_no_dangling_predicate_argument_trees(state)
         self.assert_no_dangling_smt_formula_argument_trees(state)
 
-        if (
-            self.enforce_unique_trees_in_queue
-            and state.tree.structural_hash() in self.tree_hashes_in_queue
+        if self.enforce_unique_trees_in_queue and self.tree_in_queue(
+            state.tree.structural_hash()
         ):
             # Some structures can arise as well from tree insertion (existential
             # quantifier elimination) and expansion; also, tree insertion can yield
@@ -3148,7 +3738,7 @@ class ISLaSolver:
             self.logger.debug("Discarding state %s, tree already in queue", state)
             return False
 
-        if hash(state) in self.state_hashes_in_queue:
+        if self.state_in_queue(hash(state)):
             self.logger.debug("Discarding state %s, already in queue", state)
             return False
 
@@ -3163,9 +3753,9 @@ class ISLaSolver:
         self.recompute_costs()
 
         cost = self.compute_cost(state)
-        heapq.heappush(self.queue, (cost, state))
         self.tree_hashes_in_queue.add(state.tree.structural_hash())
         self.state_hashes_in_queue.add(hash(state))
+        self.push_state(cost, state)
 
         if self.debug:
             self.state_tree[self.current_state].append(state)
@@ -3190,13 +3780,148 @@ class ISLaSolver:
 
         self.last_cost_recomputation = self.step_cnt
         self.logger.info(
-            f"Recomputing costs in queue after {self.step_cnt} solver steps"
+            f"Invalidating costs in queue after {self.step_cnt} solver steps"
         )
-        old_queue = list(self.queue)
-        self.queue = []
-        for _, state in old_queue:
-            cost = self.compute_cost(state)
+
+        # We do not rebuild the whole queue here. Instead, the costs of the
+        # states in the queue become outdated and are recomputed when the
+        # respective states are popped (see `pop_state`).
+        self.cost_epoch += 1
+
+    def push_state(
+        self, cost: float, state: SolutionState, epoch: Optional[int] = None
+    ) -> None:
+        """
+        Pushes the given state with the given cost into the queue and records
+        the cost epoch in which the cost has been computed. If the queue exceeds
+        :code:`max_queue_states`, its more costly half is spilled to disk (see
+        :meth:`~isla.solver.ISLaSolver.spill_queue`).
+
+        :param cost: The cost of the state.
+        :param state: The state to push.
+        :param epoch: The cost epoch of :code:`cost`; the current epoch if None.
+        :return: Nothing.
+        """
+
+        heapq.heappush(self.queue, (cost, state))
+        self.queue_cost_epochs[hash(state)] = (
+            self.cost_epoch if epoch is None else epoch
+        )
+
+        if (
+            self.max_queue_states is not None
+            and len(self.queue) > self.max_queue_states
+        ):
+            self.spill_queue()
+
+    def spill_queue(self) -> None:
+        """
+        Moves the more costly half of the in-memory queue to the on-disk store
+        :code:`self.spilled_queue`, which is created if necessary. The hashes of
+        the moved states are removed from the in-memory hash sets; the store
+        answers membership queries for them (see
+        :meth:`~isla.solver.ISLaSolver.state_in_queue`).
+
+        :return: Nothing.
+        """
+
+        # A sorted list satisfies the heap invariant.
+        self.queue.sort()
+        keep = self.max_queue_states // 2
+        spilled = self.queue[keep:]
+        self.queue = self.queue[:keep]
+
+        if self.spilled_queue is None:
+            self.spilled_queue = SpilledQueue()
+
+        entries = []
+        for cost, state in spilled:
+            state_hash = hash(state)
+            tree_hash = state.tree.structural_hash()
+            epoch = self.queue_cost_epochs.pop(state_hash, self.cost_epoch)
+            self.state_hashes_in_queue.discard(state_hash)
+            self.tree_hashes_in_queue.discard(tree_hash)
+            entries.append((cost, state, state_hash, tree_hash, epoch))
+
+        self.spilled_queue.push_many(entries)
+        self.logger.debug(
+            "Spilled %d states to disk (%d spilled states in total)",
+            len(entries),
+            len(self.spilled_queue),
+        )
+
+    def page_in_queue(self) -> None:
+        """
+        Moves the cheapest states from the on-disk store back into the (empty)
+        in-memory queue, filling up half of :code:`max_queue_states`.
+
+        :return: Nothing.
+        """
+
+        assert self.spilled_queue
+        entries = self.spilled_queue.pop_cheapest(self.max_queue_states // 2)
+        for cost, state, state_hash, tree_hash, epoch in entries:
+            self.state_hashes_in_queue.add(state_hash)
+            self.tree_hashes_in_queue.add(tree_hash)
             heapq.heappush(self.queue, (cost, state))
+            self.queue_cost_epochs[state_hash] = epoch
+
+        self.logger.debug("Paged in %d states from disk", len(entries))
+
+    def state_in_queue(self, state_hash: int) -> bool:
+        """
+        :param state_hash: The hash of a state.
+        :return: True iff a state with the given hash is in the in-memory queue or
+          has been spilled to disk.
+        """
+
+        return state_hash in self.state_hashes_in_queue or (
+            self.spilled_queue is not None
+            and self.spilled_queue.contains_state(state_hash)
+        )
+
+    def tree_in_queue(self, tree_hash: int) -> bool:
+        """
+        :param tree_hash: The structural hash of a tree.
+        :return: True iff a state with a tree with the given hash is in the
+          in-memory queue or has been spilled to disk.
+        """
+
+        return tree_hash in self.tree_hashes_in_queue or (
+            self.spilled_queue is not None
+            and self.spilled_queue.contains_tree(tree_hash)
+        )
+
+    def pop_state(self) -> Tuple[float, SolutionState]:
+        """
+        Pops the state with the lowest cost from the queue. If the cost of that
+        state has been computed before the last call to
+        :meth:`~isla.solver.ISLaSolver.recompute_costs`, it is recomputed. If the
+        state is no longer the cheapest one, it is pushed back into the queue with
+        its new cost, and the next state is considered.
+
+        If the in-memory queue is empty, states are first paged in from the
+        on-disk store.
+
+        :return: A pair of the (up-to-date) cost and the popped state.
+        """
+
+        while True:
+            if not self.queue:
+                self.page_in_queue()
+
+            cost, state = heapq.heappop(self.queue)
+            # States without a recorded epoch (e.g., pushed directly into the
+            # queue from outside) count as up-to-date.
+            epoch = self.queue_cost_epochs.pop(hash(state), self.cost_epoch)
+            if epoch == self.cost_epoch:
+                return cost, state
+
+            cost = self.compute_cost(state)
+            if not self.queue or cost <= self.queue[0][0]:
+                return cost, state
+
+            self.push_state(cost, state)
 
     def assert_no_dangling_smt_formula_argument_trees(
         self, state: SolutionState
@@ -3265,7 +3990,8 @@ class ISLaSolver:
         if state.constraint == sc.true():
             return 0
 
-        return self.cost_computer.compute_cost(state)
+        with self.profile_operation("cost_computation"):
+            return self.cost_computer.compute_cost(state)
 
     def remove_nonmatching_universal_quantifiers(
         self, state: SolutionState
@@ -3440,6 +4166,15 @@ class ISLaSolver:
         return z3_regex
 
 
+# The maximum number of states for which a
+# :class:`~isla.solver.GrammarBasedBlackboxCostComputer` caches cost components.
+MAX_CACHED_STATE_COSTS = 50000
+
+# The maximum number of invalid values for "int" variables excluded by
+# :meth:`~isla.solver.ISLaSolver.solve_smt_session` before giving up.
+MAX_INVALID_NUMERIC_SOLUTIONS = 1000
+
+
 class CostComputer(ABC):
     def compute_cost(self, state: SolutionState) -> float:
         """
@@ -3461,6 +4196,17 @@ class CostComputer(ABC):
         """
         raise NotImplementedError()
 
+    def num_resets(self) -> int:
+        """
+        Returns how often the internal information for cost computation has been
+        reset (e.g., after :meth:`~isla.solver.CostComputer.signal_tree_output`).
+        After a reset, costs computed before can be too high; the solver then
+        re-ranks the states in its queue.
+
+        :return: The number of resets.
+        """
+        return 0
+
 
 class GrammarBasedBlackboxCostComputer(CostComputer):
     def __init__(
@@ -3474,14 +4220,44 @@ class GrammarBasedBlackboxCostComputer(CostComputer):
         self.graph = graph
 
         self.covered_k_paths: Set[Tuple[gg.Node, ...]] = set()
+        self.coverage_resets = 0
         self.rounds_with_no_new_coverage = 0
         self.reset_coverage_after_n_round_with_no_coverage = (
             reset_coverage_after_n_round_with_no_coverage
         )
         self.symbol_costs: Optional[Dict[str, int]] = symbol_costs
 
+        # Cost components that do not depend on the global coverage, by state.
+        # When the coverage changes, only the remaining components are recomputed.
+        self.state_costs: Dict[SolutionState, Tuple[float, int, float]] = {}
+
         self.logger = logging.getLogger(type(self).__name__)
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Grammar graph nodes cache the hashes of their symbols, which are salted
+        # differently in each Python process. We thus store the grammar and
+        # the symbols of the covered k-paths instead of graph nodes, and
+        # reconstruct the graph when unpickling.
+        result = dict(self.__dict__)
+        result["graph"] = self.graph.to_grammar()
+        result["state_costs"] = {}
+        result["covered_k_paths"] = {
+            tuple((type(node).__name__, node.symbol) for node in path)
+            for path in self.covered_k_paths
+        }
+        return result
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        graph = GrammarGraph.from_grammar(state["graph"])
+        nodes = {(type(node).__name__, node.symbol): node for node in graph.all_nodes}
+
+        self.__dict__.update(state)
+        self.graph = graph
+        self.covered_k_paths = {
+            tuple(nodes[node_key] for node_key in path)
+            for path in state["covered_k_paths"]
+        }
+
     def __repr__(self):
         return (
             "GrammarBasedBlackboxCostComputer("
@@ -3492,22 +4268,10 @@ class GrammarBasedBlackboxCostComputer(CostComputer):
         )
 
     def compute_cost(self, state: SolutionState) -> float:
-        # How costly is it to finish the tree?
-        tree_closing_cost = self.compute_tree_closing_cost(state.tree)
-
-        # Quantifiers are expensive (universal formulas have to be matched, tree insertion for existential
-        # formulas is even more costly). TODO: Penalize nested quantifiers more.
-        constraint_cost = sum(
-            [
-                idx * (2 if isinstance(f, language.ExistsFormula) else 1) + 1
-                for c in get_quantifier_chains(state.constraint)
-                for idx, f in enumerate(c)
-            ]
+        tree_closing_cost, constraint_cost, k_cov_cost = self._compute_state_costs(
+            state
         )
 
-        # k-Path coverage: Fewer covered -> higher penalty
-        k_cov_cost = self._compute_k_coverage_cost(state)
-
         # Covered k-paths: Fewer contributed -> higher penalty
         global_k_path_cost = self._compute_global_k_coverage_cost(state)
 
@@ -3537,9 +4301,40 @@ class GrammarBasedBlackboxCostComputer(CostComputer):
 
         return result
 
+    def _compute_state_costs(self, state: SolutionState) -> Tuple[float, int, float]:
+        if state in self.state_costs:
+            return self.state_costs[state]
+
+        # How costly is it to finish the tree?
+        tree_closing_cost = self.compute_tree_closing_cost(state.tree)
+
+        # Quantifiers are expensive (universal formulas have to be matched, tree insertion for existential
+        # formulas is even more costly). TODO: Penalize nested quantifiers more.
+        constraint_cost = sum(
+            [
+                idx * (2 if isinstance(f, language.ExistsFormula) else 1) + 1
+                for c in get_quantifier_chains(state.constraint)
+                for idx, f in enumerate(c)
+            ]
+        )
+
+        # k-Path coverage: Fewer covered -> higher penalty
+        k_cov_cost = self._compute_k_coverage_cost(state)
+
+        if len(self.state_costs) >= MAX_CACHED_STATE_COSTS:
+            # Evict the oldest entry; dictionaries preserve the insertion order.
+            del self.state_costs[next(iter(self.state_costs))]
+
+        result = tree_closing_cost, constraint_cost, k_cov_cost
+        self.state_costs[state] = result
+        return result
+
     def signal_tree_output(self, tree: DerivationTree) -> None:
         self._update_covered_k_paths(tree)
 
+    def num_resets(self) -> int:
+        return self.coverage_resets
+
     def _symbol_costs(self):
         if self.symbol_costs is None:
             self.symbol_costs = compute_symbol_costs(self.graph)
@@ -3592,6 +4387,7 @@ class GrammarBasedBlackboxCostComputer(CostComputer):
                     # )
 
                 self.covered_k_paths = set()
+                self.coverage_resets += 1
             else:
                 pass
                 # uncovered_paths = (
@@ -3693,6 +4489,66 @@ class GrammarBasedBlackboxCostComputer(CostComputer):
         return sum([self._symbol_costs()[nonterminal] for nonterminal in nonterminals])
 
 
+CHECKPOINT_MAGIC = b"ISLACKPT"
+CHECKPOINT_FORMAT_VERSION = 2
+
+CHECKPOINT_SETTINGS = 0
+CHECKPOINT_SEARCH_STATE = 1
+CHECKPOINT_SOLUTION = 2
+CHECKPOINT_QUEUE_ENTRY = 3
+
+
+def write_checkpoint_record(out_file: BinaryIO, kind: int, payload: Any) -> None:
+    """
+    Writes a single solver checkpoint record to :code:`out_file`. A record consists
+    of a four-byte length prefix followed by the compressed, pickled pair of
+    :code:`kind` and :code:`payload`. We use dill to be able to pickle lambdas
+    (e.g., in semantic predicates or fuzzer factories).
+
+    >>> import io
+    >>> out_file = io.BytesIO()
+    >>> write_checkpoint_record(out_file, CHECKPOINT_SOLUTION, "Hello")
+    >>> write_checkpoint_record(out_file, CHECKPOINT_SOLUTION, "World")
+    >>> _ = out_file.seek(0)
+    >>> list(read_checkpoint_records(out_file))
+    [(2, 'Hello'), (2, 'World')]
+
+    :param out_file: The binary file to write to.
+    :param kind: The kind of the record (e.g., :code:`CHECKPOINT_QUEUE_ENTRY`).
+    :param payload: The object to store.
+    :return: Nothing.
+    """
+
+    data = zlib.compress(dill.dumps((kind, payload)))
+    out_file.write(struct.pack(">I", len(data)))
+    out_file.write(data)
+
+
+def read_checkpoint_records(in_file: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """
+    Lazily reads the records written by :func:`~isla.solver.write_checkpoint_record`
+    from :code:`in_file` until the end of the file is reached.
+
+    :param in_file: The binary file to read from.
+    :return: An iterator of pairs of record kinds and payloads.
+    """
+
+    while True:
+        length_bytes = in_file.read(4)
+        if not length_bytes:
+            return
+
+        if len(length_bytes) < 4:
+            raise ValueError("Truncated checkpoint record")
+
+        (length,) = struct.unpack(">I", length_bytes)
+        data = in_file.read(length)
+        if len(data) < length:
+            raise ValueError("Truncated checkpoint record")
+
+        yield dill.loads(zlib.decompress(data))
+
+
 def smt_formulas_referring_to_subtrees(
     smt_formulas: Sequence[language.SMTFormula],
 ) -> List[language.SMTFormula]:
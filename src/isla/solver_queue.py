@@ -0,0 +1,210 @@
+# Copyright © 2023 CISPA Helmholtz Center for Information Security.
+# Author: Dominic Steinhöfel.
+#
+# This file is part of ISLa.
+#
+# ISLa is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ISLa is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ISLa.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sqlite3
+import tempfile
+import weakref
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import dill
+
+# A spilled queue entry: the cost, the state, the hash of the state, the
+# structural hash of the state's tree, and the cost epoch of the entry.
+SpilledEntry = Tuple[float, Any, int, int, int]
+
+
+class SpilledQueue:
+    """
+    An on-disk store for the low-priority part of the queue of an
+    :class:`~isla.solver.ISLaSolver`. The entries are kept in an SQLite database
+    in a temporary file that is removed when the store is closed or garbage
+    collected. States are pickled; the state and tree hashes are stored
+    alongside to answer membership queries without unpickling.
+
+    >>> store = SpilledQueue()
+    >>> store.push_many([(3, "c", 3, 30, 0), (1, "a", 1, 10, 0), (2, "b", 2, 20, 1)])
+    >>> len(store), store.min_cost()
+    (3, 1.0)
+    >>> store.contains_state(2), store.contains_tree(40)
+    (True, False)
+    >>> store.pop_cheapest(2)
+    [(1.0, 'a', 1, 10, 0), (2.0, 'b', 2, 20, 1)]
+    >>> len(store), store.min_cost()
+    (1, 3.0)
+    >>> store.close()
+
+    Since string hashes are salted differently in each Python process, a store
+    must not be shared between processes.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        :param directory: The directory for the database file. If None, the
+          default directory for temporary files is used.
+        """
+
+        fd, self.path = tempfile.mkstemp(
+            prefix="isla-queue-", suffix=".sqlite", dir=directory
+        )
+        os.close(fd)
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(
+            "CREATE TABLE entries (id INTEGER PRIMARY KEY, cost REAL, "
+            + "state_hash INTEGER, tree_hash INTEGER, epoch INTEGER, state BLOB)"
+        )
+        self.connection.execute("CREATE INDEX entries_cost ON entries (cost)")
+        self.connection.execute(
+            "CREATE INDEX entries_state_hash ON entries (state_hash)"
+        )
+        self.connection.execute("CREATE INDEX entries_tree_hash ON entries (tree_hash)")
+
+        self.size = 0
+        self.cached_min_cost: Optional[float] = None
+
+        self.finalizer = weakref.finalize(
+            self, SpilledQueue._cleanup, self.connection, self.path
+        )
+
+    @staticmethod
+    def _cleanup(connection: sqlite3.Connection, path: str) -> None:
+        connection.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[SpilledEntry]:
+        """
+        Iterates over all entries in the store (in no particular order) without
+        removing them.
+
+        :return: An iterator over the stored entries.
+        """
+
+        for cost, state, state_hash, tree_hash, epoch in self.connection.execute(
+            "SELECT cost, state, state_hash, tree_hash, epoch FROM entries"
+        ):
+            yield cost, dill.loads(state), state_hash, tree_hash, epoch
+
+    def push_many(self, entries: Iterable[SpilledEntry]) -> None:
+        """
+        Adds the given entries to the store.
+
+        :param entries: The entries to add.
+        :return: Nothing.
+        """
+
+        rows = [
+            (cost, state_hash, tree_hash, epoch, dill.dumps(state))
+            for cost, state, state_hash, tree_hash, epoch in entries
+        ]
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO entries (cost, state_hash, tree_hash, epoch, state) "
+                + "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+        self.size += len(rows)
+        self.cached_min_cost = None
+
+    def pop_cheapest(self, n: int) -> List[SpilledEntry]:
+        """
+        Removes the (up to) :code:`n` entries with the lowest costs from the store
+        and returns them, ordered by cost.
+
+        :param n: The maximum number of entries to remove.
+        :return: The removed entries.
+        """
+
+        rows = self.connection.execute(
+            "SELECT id, cost, state, state_hash, tree_hash, epoch FROM entries "
+            + "ORDER BY cost, id LIMIT ?",
+            (n,),
+        ).fetchall()
+
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM entries WHERE id = ?", [(row[0],) for row in rows]
+            )
+
+        self.size -= len(rows)
+        self.cached_min_cost = None
+
+        return [
+            (cost, dill.loads(state), state_hash, tree_hash, epoch)
+            for _, cost, state, state_hash, tree_hash, epoch in rows
+        ]
+
+    def min_cost(self) -> Optional[float]:
+        """
+        :return: The lowest cost of an entry in the store, or None if the store is
+          empty.
+        """
+
+        if not self.size:
+            return None
+
+        if self.cached_min_cost is None:
+            (self.cached_min_cost,) = self.connection.execute(
+                "SELECT MIN(cost) FROM entries"
+            ).fetchone()
+
+        return self.cached_min_cost
+
+    def contains_state(self, state_hash: int) -> bool:
+        """
+        :param state_hash: The hash of a state.
+        :return: True iff the store contains a state with the given hash.
+        """
+
+        return (
+            self.size > 0
+            and self.connection.execute(
+                "SELECT 1 FROM entries WHERE state_hash = ? LIMIT 1", (state_hash,)
+            ).fetchone()
+            is not None
+        )
+
+    def contains_tree(self, tree_hash: int) -> bool:
+        """
+        :param tree_hash: The structural hash of a tree.
+        :return: True iff the store contains a state whose tree has the given
+          structural hash.
+        """
+
+        return (
+            self.size > 0
+            and self.connection.execute(
+                "SELECT 1 FROM entries WHERE tree_hash = ? LIMIT 1", (tree_hash,)
+            ).fetchone()
+            is not None
+        )
+
+    def close(self) -> None:
+        """
+        Closes the database connection and removes the database file.
+
+        :return: Nothing.
+        """
+
+        self.finalizer()
@@ -20,8 +20,20 @@ import logging
 import operator
 import random
 import re
+from contextlib import contextmanager
 from functools import lru_cache, reduce
-from typing import Callable, Tuple, cast, List, Optional, Dict, Union, Generator, Set
+from typing import (
+    Callable,
+    Tuple,
+    cast,
+    List,
+    Optional,
+    Dict,
+    Union,
+    Generator,
+    Set,
+    Iterable,
+)
 
 import z3
 from z3.z3 import _coerce_exprs
@@ -592,6 +604,141 @@ def z3_solve(
     return result, model
 
 
+class Z3Session:
+    """
+    A persistent Z3 solver for enumerating several models of the same formulas.
+    In contrast to :func:`~isla.z3_helpers.z3_solve`, which sets up a new solver
+    for each query, the base assertions are only added once; for each found model,
+    a blocking clause is added to the same solver. This allows Z3 to reuse what it
+    has learned in previous queries.
+
+    >>> x = z3.Int("x")
+    >>> session = Z3Session([x > 0, x < 4])
+    >>> models = []
+    >>> while True:
+    ...     result, model = session.check()
+    ...     if result != z3.sat:
+    ...         break
+    ...     models.append(model[x].as_long())
+    ...     session.block(x == model[x])
+    >>> sorted(models)
+    [1, 2, 3]
+    >>> result
+    unsat
+
+    Temporary assertions can be added in a scope; they are retracted when leaving
+    the scope.
+
+    >>> with session.scope():
+    ...     session.add(x == 5)
+    ...     session.check()[0]
+    unsat
+    >>> session.num_scopes()
+    0
+    """
+
+    def __init__(self, formulas: Iterable[z3.BoolRef], timeout_ms: Optional[int] = 500):
+        """
+        :param formulas: The base assertions.
+        :param timeout_ms: The timeout for each call to Z3 (in milliseconds). If Z3
+          returns "unknown", the query is retried with a slightly different timeout
+          and random seed (up to 20 times).
+        """
+
+        self.logger = logging.getLogger("z3_solve")
+        self.timeout_ms = timeout_ms
+        self.solver = z3.Solver()
+        self.formulas: List[z3.BoolRef] = []
+        for formula in formulas:
+            self.add(formula)
+
+    def add(self, formula: z3.BoolRef) -> None:
+        """
+        Adds an assertion to the session.
+
+        :param formula: The assertion.
+        :return: Nothing.
+        """
+
+        self.solver.add(formula)
+        self.formulas.append(formula)
+
+    def block(self, formula: z3.BoolRef) -> None:
+        """
+        Excludes all models satisfying :code:`formula`, typically a conjunction of
+        equations describing a model found before.
+
+        :param formula: The formula describing the models to exclude.
+        :return: Nothing.
+        """
+
+        self.add(z3.Not(formula))
+
+    @contextmanager
+    def scope(self) -> Generator[None, None, None]:
+        """
+        A context manager for temporary assertions. Assertions added inside the
+        :code:`with` block are retracted afterward (using Z3's :code:`push` and
+        :code:`pop`).
+
+        :return: A context manager.
+        """
+
+        num_formulas = len(self.formulas)
+        self.solver.push()
+        try:
+            yield
+        finally:
+            self.solver.pop()
+            del self.formulas[num_formulas:]
+
+    def num_scopes(self) -> int:
+        """
+        :return: The number of currently open scopes.
+        """
+
+        return self.solver.num_scopes()
+
+    def check(self) -> Tuple[z3.CheckSatResult, Optional[z3.ModelRef]]:
+        """
+        Checks the satisfiability of the current assertions.
+
+        :return: The result of the check and, if the result is "sat", a model.
+        """
+
+        result = z3.unknown  # To remove IDE warning
+        model: Optional[z3.ModelRef] = None
+        timeout_ms = self.timeout_ms
+        parallel = False
+
+        for _ in range(20):
+            if timeout_ms is not None:
+                self.solver.set("timeout", timeout_ms)
+            result = self.solver.check()
+
+            if result == z3.sat:
+                model = self.solver.model()
+
+            if result != z3.unknown:
+                break
+
+            if timeout_ms is None:
+                break
+
+            timeout_ms = int(timeout_ms * 0.9) + 1
+            parallel = not parallel
+            z3.set_param("parallel.enable", parallel)
+            self.solver.set("random_seed", random.randint(0, 99999))
+
+        if result == z3.unknown:
+            self.logger.warning(
+                "Satisfiability of %s could not be decided",
+                list(map(str, self.formulas)),
+            )
+
+        return result, model
+
+
 class DomainError(RuntimeError):
     def __init__(self, msg: str, *args):
         super().__init__(msg, *args)
@@ -177,6 +177,118 @@ exists <assgn> assgn:
         for solution in stdout.split("\n"):
             parser.parse(solution)
 
+    def test_solve_assgn_lang_parallel(self):
+        grammar_file = write_grammar_file(LANG_GRAMMAR)
+
+        constraint = """
+exists <assgn> assgn:
+  (before(assgn, <assgn>) and <assgn>.<rhs>.<var> = assgn.<var>)"""
+        constraint_file = write_constraint_file(constraint)
+
+        stdout, stderr, code = run_isla(
+            "solve",
+            grammar_file.name,
+            constraint_file.name,
+            "--jobs",
+            2,
+            "-n",
+            5,
+            "-t",
+            10,
+        )
+
+        self.assertFalse(code)
+        self.assertFalse(stderr)
+
+        lines = stdout.split("\n")
+        self.assertEqual(5, len(lines))
+        self.assertEqual(len(lines), len(set(lines)))
+
+        solver = ISLaSolver(LANG_GRAMMAR, constraint)
+        for line in lines:
+            self.assertTrue(solver.check(line))
+
+        grammar_file.close()
+        constraint_file.close()
+
+    def test_solve_assgn_lang_max_queue_states(self):
+        grammar_file = write_grammar_file(LANG_GRAMMAR)
+
+        constraint = """
+exists <assgn> assgn:
+  (before(assgn, <assgn>) and <assgn>.<rhs>.<var> = assgn.<var>)"""
+        constraint_file = write_constraint_file(constraint)
+
+        stdout, stderr, code = run_isla(
+            "solve",
+            grammar_file.name,
+            constraint_file.name,
+            "--max-queue-states",
+            4,
+            "-n",
+            20,
+        )
+
+        self.assertFalse(code)
+        self.assertFalse(stderr)
+
+        lines = stdout.split("\n")
+        self.assertEqual(20, len(lines))
+
+        solver = ISLaSolver(LANG_GRAMMAR, constraint)
+        for line in lines:
+            self.assertTrue(solver.check(line))
+
+        grammar_file.close()
+        constraint_file.close()
+
+    def test_solve_assgn_lang_profile(self):
+        grammar_file = write_grammar_file(LANG_GRAMMAR)
+
+        constraint = """
+exists <assgn> assgn:
+  (before(assgn, <assgn>) and <assgn>.<rhs>.<var> = assgn.<var>)"""
+        constraint_file = write_constraint_file(constraint)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profile_file = os.path.join(tmp_dir, "profile.json")
+
+            stdout, stderr, code = run_isla(
+                "solve",
+                grammar_file.name,
+                constraint_file.name,
+                "--profile",
+                profile_file,
+                "-n",
+                5,
+            )
+
+            self.assertFalse(code)
+            self.assertFalse(stderr)
+            self.assertEqual(5, len(stdout.split("\n")))
+
+            with open(profile_file) as in_file:
+                stats = json.load(in_file)
+
+        self.assertGreater(stats["steps"], 0)
+        self.assertIn("expand", stats["stages"])
+        self.assertIn("cost_computation", stats["operations"])
+
+        grammar_file.close()
+        constraint_file.close()
+
+    def test_solve_profile_parallel(self):
+        grammar_file = write_grammar_file(LANG_GRAMMAR)
+
+        stdout, stderr, code = run_isla(
+            "solve", grammar_file.name, "--profile", "profile.json", "--jobs", 2
+        )
+
+        self.assertEqual(2, code)
+        self.assertIn("--profile is not supported", stderr)
+
+        grammar_file.close()
+
     def test_solve_assgn_lang_additional_constraint(self):
         grammar_file = write_grammar_file(LANG_GRAMMAR)
 
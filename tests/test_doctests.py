@@ -13,10 +13,13 @@ from isla import (
     language,
     optimizer,
     mutator,
+    parallel_solver,
     parser,
     performance_evaluator,
+    profiler,
     three_valued_truth,
     solver,
+    solver_queue,
     trie,
     type_defs,
     z3_helpers,
@@ -68,6 +71,10 @@ class TestDocstrings(unittest.TestCase):
         doctest_results = doctest.testmod(m=optimizer)
         self.assertFalse(doctest_results.failed)
 
+    def test_parallel_solver(self):
+        doctest_results = doctest.testmod(m=parallel_solver)
+        self.assertFalse(doctest_results.failed)
+
     def test_parser(self):
         doctest_results = doctest.testmod(m=parser)
         self.assertFalse(doctest_results.failed)
@@ -76,10 +83,18 @@ class TestDocstrings(unittest.TestCase):
         doctest_results = doctest.testmod(m=performance_evaluator)
         self.assertFalse(doctest_results.failed)
 
+    def test_profiler(self):
+        doctest_results = doctest.testmod(m=profiler)
+        self.assertFalse(doctest_results.failed)
+
     def test_solver(self):
         doctest_results = doctest.testmod(m=solver)
         self.assertFalse(doctest_results.failed)
 
+    def test_solver_queue(self):
+        doctest_results = doctest.testmod(m=solver_queue)
+        self.assertFalse(doctest_results.failed)
+
     def test_three_valued_truth(self):
         doctest_results = doctest.testmod(m=three_valued_truth)
         self.assertFalse(doctest_results.failed)
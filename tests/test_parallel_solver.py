@@ -0,0 +1,175 @@
+# Copyright © 2023 CISPA Helmholtz Center for Information Security.
+# Author: Dominic Steinhöfel.
+#
+# This file is part of ISLa.
+#
+# ISLa is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ISLa is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with ISLa.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from isla import isla_shortcuts as sc
+from isla.derivation_tree import DerivationTree
+from isla.parallel_solver import (
+    ParallelISLaSolver,
+    default_portfolio,
+    WorkSharingISLaSolver,
+    FrontierCoordinator,
+    pack_frontier_entry,
+)
+from isla.solver import (
+    ISLaSolver,
+    CostComputer,
+    SolutionState,
+)
+from test_data import LANG_GRAMMAR
+
+
+class TestParallelSolver(unittest.TestCase):
+    def test_portfolio_solutions_are_valid_and_unique(self):
+        constraint = """
+forall <assgn> assgn_1="<var> := {<var> rhs}" in start:
+  exists <assgn> assgn_2:
+    (before(assgn_2, assgn_1) and assgn_2.<var> = rhs)"""
+
+        checker = ISLaSolver(LANG_GRAMMAR, constraint)
+
+        with ParallelISLaSolver(
+            LANG_GRAMMAR,
+            constraint,
+            jobs=2,
+            max_number_free_instantiations=1,
+            max_number_smt_instantiations=1,
+            timeout_seconds=10,
+        ) as solver:
+            solutions = list(solver.solutions(limit=10))
+
+        self.assertTrue(solutions)
+        self.assertTrue(all(checker.check(str(solution)) for solution in solutions))
+        self.assertEqual(
+            len(solutions),
+            len({solution.structural_hash() for solution in solutions}),
+        )
+
+    def test_portfolio_stops_when_all_workers_are_done(self):
+        grammar = {"<start>": ["<digit>"], "<digit>": ["0", "1"]}
+
+        with ParallelISLaSolver(grammar, '<digit> = "1"', jobs=3) as solver:
+            self.assertEqual("1", str(solver.solve()))
+            self.assertFalse(solver.search_exhausted())
+            self.assertRaises(StopIteration, solver.solve)
+            self.assertTrue(solver.search_exhausted())
+
+    def test_default_portfolio_varies_workers(self):
+        portfolio = default_portfolio(4, seed=1)
+        self.assertEqual(4, len({config.seed for config in portfolio}))
+        self.assertEqual(4, len({config.cost_settings for config in portfolio}))
+        self.assertEqual(
+            4, len({config.tree_insertion_methods for config in portfolio})
+        )
+
+    def test_work_sharing_solutions_are_valid_and_unique(self):
+        constraint = """
+forall <assgn> assgn_1="<var> := {<var> rhs}" in start:
+  exists <assgn> assgn_2:
+    (before(assgn_2, assgn_1) and assgn_2.<var> = rhs)"""
+
+        checker = ISLaSolver(LANG_GRAMMAR, constraint)
+
+        with WorkSharingISLaSolver(
+            LANG_GRAMMAR,
+            constraint,
+            jobs=2,
+            batch_size=2,
+            max_number_free_instantiations=1,
+            max_number_smt_instantiations=1,
+            timeout_seconds=20,
+        ) as solver:
+            solutions = []
+            for _ in range(10):
+                try:
+                    solutions.append(solver.solve())
+                except (StopIteration, TimeoutError):
+                    break
+
+        self.assertEqual(10, len(solutions))
+        self.assertTrue(all(checker.check(str(solution)) for solution in solutions))
+        self.assertEqual(
+            len(solutions),
+            len({solution.structural_hash() for solution in solutions}),
+        )
+
+    def test_work_sharing_finds_all_solutions(self):
+        grammar = {"<start>": ["<digit><digit>"], "<digit>": ["0", "1"]}
+
+        with WorkSharingISLaSolver(
+            grammar, '<digit> = "1"', jobs=2, max_number_smt_instantiations=2
+        ) as solver:
+            solutions = set()
+            try:
+                while True:
+                    solutions.add(str(solver.solve()))
+            except StopIteration:
+                pass
+
+        self.assertEqual({"11"}, solutions)
+
+    def test_frontier_coordinator_enforces_unique_trees(self):
+        tree = DerivationTree("<a>", None)
+        coordinator = FrontierCoordinator(
+            [pack_frontier_entry(1, SolutionState(sc.true(), tree))],
+            enforce_unique_trees_in_queue=True,
+        )
+
+        # Same tree, different constraint
+        self.assertEqual([], coordinator.take_states(0, 0))
+        coordinator.return_states(
+            0, 0, [pack_frontier_entry(0, SolutionState(sc.false(), tree))], []
+        )
+        self.assertEqual(1, len(coordinator.take_states(0, 5)))
+
+        # The tree is no longer in the queue
+        coordinator.return_states(
+            0, 1, [pack_frontier_entry(0, SolutionState(sc.false(), tree))], []
+        )
+        self.assertEqual(1, len(coordinator.take_states(0, 5)))
+
+    def test_work_sharing_reraises_worker_exceptions(self):
+        grammar = {"<start>": ["<digit><digit>"], "<digit>": ["0", "1"]}
+
+        with WorkSharingISLaSolver(
+            grammar,
+            '<digit> = "1"',
+            jobs=2,
+            cost_computer=FailingCostComputer(),
+        ) as solver:
+            with self.assertRaises(ValueError) as context:
+                solver.solve()
+
+        self.assertEqual("cost computation failed", str(context.exception))
+
+
+class FailingCostComputer(CostComputer):
+    """Fails for all states except for the initial ones (which have level 0)."""
+
+    def compute_cost(self, state: SolutionState) -> float:
+        if state.level > 0:
+            raise ValueError("cost computation failed")
+        return 0
+
+    def signal_tree_output(self, tree: DerivationTree) -> None:
+        pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,7 +22,10 @@ import logging
 import os
 import random
 import string
+import subprocess
 import sys
+import tempfile
+import time
 import unittest
 from datetime import datetime
 from typing import cast, Optional, Dict, List, Callable, Union, Set
@@ -73,6 +76,7 @@ from isla.solver import (
     get_quantifier_chains,
     CostComputer,
     GrammarBasedBlackboxCostComputer,
+    STD_COST_SETTINGS,
     implies,
     equivalent,
     UnknownResultError,
@@ -1376,6 +1380,35 @@ and str.len(<payload>) = 10
                 2 * len(str(solution[payload_tree])),
             )
 
+    def test_smt_instantiations_use_one_session(self):
+        solver = ISLaSolver(LANG_GRAMMAR, max_number_smt_instantiations=10)
+
+        sessions = []
+        create_smt_session = solver.create_smt_session
+
+        def recording_create_smt_session(*args):
+            sessions.append(create_smt_session(*args))
+            return sessions[-1]
+
+        solver.create_smt_session = recording_create_smt_session
+
+        var = language.BoundVariable("var", "<var>")
+        var_tree = DerivationTree("<var>", None)
+        formula = language.SMTFormula(
+            z3.Not(z3_eq(var.to_smt(), z3.StringVal("a"))),
+            instantiated_variables=OrderedSet([var]),
+            substitutions={var: var_tree},
+        )
+
+        solutions = solver.solve_quantifier_free_formula((formula,))
+
+        self.assertEqual(10, len(solutions))
+        values = {str(solution[var_tree]) for solution in solutions}
+        self.assertEqual(10, len(values))
+        self.assertNotIn("a", values)
+
+        self.assertEqual(1, len(sessions))
+
     def test_solve_bnf_xmllike(self):
         grammar_str = rf'''
 <start> ::= "<a>" <x> "</a>"
@@ -2243,6 +2276,285 @@ and str.to.int(<due-payable>.<INT>) =
             max_number_smt_instantiations=10,
         )
 
+    def test_solve_many(self):
+        solver = ISLaSolver(LANG_GRAMMAR, max_number_free_instantiations=5)
+
+        first_batch = solver.solve_many(3)
+        second_batch = solver.solve_many(3)
+        self.assertEqual(3, len(first_batch))
+        self.assertEqual(2, len(second_batch))
+        self.assertEqual(
+            5, len({tree.structural_hash() for tree in first_batch + second_batch})
+        )
+
+        self.assertRaises(StopIteration, lambda: solver.solve_many(3))
+        self.assertRaises(StopIteration, solver.solve)
+        self.assertTrue(solver.search_exhausted())
+
+    def test_solutions_generator(self):
+        formula = """
+forall <assgn> assgn_1:
+  exists <assgn> assgn_2: (
+    before(assgn_2, assgn_1) and
+    assgn_1.<rhs>.<var> = assgn_2.<var>)"""
+
+        solver = ISLaSolver(LANG_GRAMMAR, formula)
+        solutions = list(solver.solutions(limit=20))
+        self.assertEqual(20, len(solutions))
+        self.assertTrue(all(solver.check(solution) for solution in solutions))
+
+        # The generator ends quietly if the deadline has passed.
+        self.assertEqual([], list(solver.solutions(deadline=time.time() - 1)))
+
+        solver = ISLaSolver(LANG_GRAMMAR, max_number_free_instantiations=5)
+        self.assertEqual(5, len(list(solver.solutions())))
+
+    def test_checkpoint_and_resume(self):
+        formula = """
+forall <assgn> assgn_1:
+  exists <assgn> assgn_2: (
+    before(assgn_2, assgn_1) and
+    assgn_1.<rhs>.<var> = assgn_2.<var>)"""
+
+        solver = ISLaSolver(LANG_GRAMMAR, formula)
+        for _ in range(3):
+            solver.solve()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "solver.ckpt")
+            solver.checkpoint(path)
+            resumed = ISLaSolver.resume(path)
+
+        self.assertEqual(
+            sorted(hash(state) for _, state in solver.queue),
+            sorted(hash(state) for _, state in resumed.queue),
+        )
+        self.assertEqual(solver.step_cnt, resumed.step_cnt)
+        self.assertEqual(solver.seen_coverages, resumed.seen_coverages)
+        self.assertEqual(
+            solver.cost_computer.covered_k_paths,
+            resumed.cost_computer.covered_k_paths,
+        )
+
+        for _ in range(5):
+            solution = resumed.solve()
+            self.assertTrue(resumed.check(solution), str(solution))
+
+    def test_resume_in_other_process(self):
+        formula = 'forall <var> var: var = "x"'
+        solver = ISLaSolver(LANG_GRAMMAR, formula)
+        solver.solve()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "solver.ckpt")
+            solver.checkpoint(path)
+
+            # A different hash seed must not affect the resumed search.
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "from isla.solver import ISLaSolver\n"
+                    + f"solver = ISLaSolver.resume({repr(path)})\n"
+                    + "for _ in range(3): print(solver.solve())\n",
+                ],
+                env=os.environ | {"PYTHONHASHSEED": "4711"},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+        solutions = result.stdout.strip().split("\n")
+        self.assertEqual(3, len(solutions))
+        for solution in solutions:
+            self.assertTrue(solver.check(solution), solution)
+
+    def test_checkpoint_after_cost_invalidation(self):
+        solver = ISLaSolver(LANG_GRAMMAR, 'forall <var> var: var = "x"')
+        solver.solve()
+
+        solver.step_cnt = 400
+        solver.recompute_costs()
+        self.assertEqual(1, solver.cost_epoch)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "solver.ckpt")
+            solver.checkpoint(path)
+            resumed = ISLaSolver.resume(path)
+
+        self.assertEqual(solver.cost_epoch, resumed.cost_epoch)
+        self.assertEqual(
+            {
+                state.tree.structural_hash(): solver.queue_cost_epochs[hash(state)]
+                for _, state in solver.queue
+            },
+            {
+                state.tree.structural_hash(): resumed.queue_cost_epochs[hash(state)]
+                for _, state in resumed.queue
+            },
+        )
+
+    def test_lazy_cost_recomputation(self):
+        class FixedCostComputer(CostComputer):
+            def __init__(self, costs: Dict[str, float]):
+                self.costs = costs
+
+            def compute_cost(self, state: SolutionState) -> float:
+                return self.costs.get(state.tree.value, 0)
+
+            def signal_tree_output(self, tree: DerivationTree) -> None:
+                pass
+
+        states = [
+            SolutionState(sc.false(), DerivationTree(var, ()))
+            for var in ["a", "b", "c"]
+        ]
+
+        cost_computer = FixedCostComputer({"a": 1, "b": 2, "c": 3})
+        solver = ISLaSolver(LANG_GRAMMAR, cost_computer=cost_computer)
+        solver.queue = []
+        solver.queue_cost_epochs = {}
+        for state in states:
+            solver.push_state(solver.compute_cost(state), state)
+
+        cost_computer.costs = {"a": 5, "b": 2, "c": 3}
+        solver.step_cnt = 401
+        solver.recompute_costs()
+        self.assertEqual(0, solver.cost_epoch)
+
+        solver.step_cnt = 800
+        solver.recompute_costs()
+        self.assertEqual(1, solver.cost_epoch)
+
+        self.assertEqual(
+            [(2, "b"), (3, "c"), (5, "a")],
+            [
+                (cost, state.tree.value)
+                for cost, state in [solver.pop_state() for _ in range(3)]
+            ],
+        )
+        self.assertFalse(solver.queue)
+        self.assertFalse(solver.queue_cost_epochs)
+
+    def test_state_cost_components_are_cached(self):
+        solver = ISLaSolver(LANG_GRAMMAR, 'forall <var> var: var = "x"')
+        cost_computer = cast(GrammarBasedBlackboxCostComputer, solver.cost_computer)
+        _, state = solver.queue[0]
+
+        cost = cost_computer.compute_cost(state)
+        self.assertIn(state, cost_computer.state_costs)
+
+        cost_computer.compute_tree_closing_cost = None  # Must not be called again
+        self.assertEqual(cost, cost_computer.compute_cost(state))
+
+    def test_coverage_reset_invalidates_costs(self):
+        solver = ISLaSolver(
+            LANG_GRAMMAR,
+            'forall <var> var: var = "x"',
+            cost_computer=GrammarBasedBlackboxCostComputer(
+                STD_COST_SETTINGS,
+                gg.GrammarGraph.from_grammar(LANG_GRAMMAR),
+                reset_coverage_after_n_round_with_no_coverage=1,
+            ),
+        )
+
+        for _ in range(3):
+            solver.solve()
+
+        self.assertGreater(solver.cost_computer.num_resets(), 0)
+        self.assertEqual(solver.cost_computer.num_resets(), solver.cost_epoch)
+
+    def test_spill_queue_to_disk(self):
+        formula = """
+forall <assgn> assgn_1:
+  exists <assgn> assgn_2: (
+    before(assgn_2, assgn_1) and
+    assgn_1.<rhs>.<var> = assgn_2.<var>)"""
+
+        solver = ISLaSolver(LANG_GRAMMAR, formula, max_queue_states=10)
+
+        solutions = []
+        for _ in range(20):
+            solutions.append(solver.solve())
+            self.assertLessEqual(len(solver.queue), 10)
+
+        self.assertIsNotNone(solver.spilled_queue)
+        self.assertTrue(all(solver.check(solution) for solution in solutions))
+        self.assertEqual(
+            len(solutions),
+            len({solution.structural_hash() for solution in solutions}),
+        )
+
+    def test_checkpoint_with_spilled_queue(self):
+        formula = """
+forall <assgn> assgn_1:
+  exists <assgn> assgn_2: (
+    before(assgn_2, assgn_1) and
+    assgn_1.<rhs>.<var> = assgn_2.<var>)"""
+
+        solver = ISLaSolver(LANG_GRAMMAR, formula, max_queue_states=4)
+        for _ in range(15):
+            solver.solve()
+
+        self.assertTrue(solver.spilled_queue)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "solver.ckpt")
+            solver.checkpoint(path)
+            resumed = ISLaSolver.resume(path)
+
+        def queued_states(solver: ISLaSolver) -> Set[int]:
+            return {hash(state) for _, state in solver.queue} | {
+                state_hash for _, _, state_hash, _, _ in solver.spilled_queue or []
+            }
+
+        self.assertEqual(queued_states(solver), queued_states(resumed))
+        self.assertLessEqual(len(resumed.queue), 4)
+
+    def test_profile(self):
+        formula = """
+forall <assgn> assgn_1:
+  exists <assgn> assgn_2: (
+    before(assgn_2, assgn_1) and
+    assgn_1.<rhs>.<var> = assgn_2.<var>)"""
+
+        solver = ISLaSolver(LANG_GRAMMAR, formula, profile=True)
+        for _ in range(30):
+            solver.solve()
+
+        stats = solver.stats()
+        self.assertEqual(solver.step_cnt, stats["steps"])
+
+        stages = stats["stages"]
+        self.assertIn("expand", stages)
+        self.assertIn("eliminate_and_match_first_existential_formula_and_expand", stages)
+        # Each processed state is handled by at most one stage; solver steps
+        # can also return a previously computed solution.
+        self.assertLessEqual(
+            sum(stage["applications"] for stage in stages.values()), stats["steps"]
+        )
+        self.assertTrue(
+            all(stage["calls"] >= stage["applications"] for stage in stages.values())
+        )
+
+        self.assertGreater(
+            stages["eliminate_and_match_first_existential_formula_and_expand"][
+                "applications"
+            ],
+            0,
+        )
+
+        for operation in ["cost_computation", "insert_tree", "z3", "parsing"]:
+            self.assertGreater(stats["operations"][operation]["calls"], 0, operation)
+
+    def test_stats_without_profile(self):
+        solver = ISLaSolver(LANG_GRAMMAR, 'forall <var> var: var = "x"')
+        solver.solve()
+
+        stats = solver.stats()
+        self.assertEqual(solver.step_cnt, stats["steps"])
+        self.assertNotIn("stages", stats)
+
     def execute_generation_test(
         self,
         formula: language.Formula | str = "true",